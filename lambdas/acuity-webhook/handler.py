@@ -0,0 +1,216 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import sys
+import time
+import traceback
+import uuid
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from botocore.exceptions import ClientError
+from requests import HTTPError
+
+import availability
+import availability_cache
+from acuity_client import AcuityClient
+from availability_store import AvailabilityStore
+from db_repository import DBRepository
+from deadline import current_deadline, with_deadline
+from http_utils import make_response, internal_server_error, ok
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+APPOINTMENT_ACTIONS = {
+    "appointment.scheduled",
+    "appointment.rescheduled",
+    "appointment.canceled",
+    "appointment.changed",
+}
+SYNC_LEASE_SECONDS = 30  # longer than one invocation, so a crashed one never blocks an appointment for long
+SYNC_LEASE_POLL_INTERVAL = 0.2
+MIRROR_RETENTION_SECONDS = 7 * 24 * 3600  # kept after the appointment date
+MATERIALIZE_TIMEZONE = os.environ.get("MATERIALIZE_TIMEZONE") or None
+
+acuity = AcuityClient("acuity-webhook-lambda/1.0")
+coordination = DBRepository(os.environ.get("COORDINATION_TABLE"))
+view = AvailabilityStore()
+
+
+@with_deadline
+def function_handler(event, __):
+    try:
+        raw_body = _raw_body(event)
+        if not verify_signature(raw_body, _header(event, "x-acuity-signature")):
+            return make_response(HTTPStatus.UNAUTHORIZED, {"success": False, "error": "Firma inválida"})
+
+        fields = {name: values[0] for name, values in parse_qs(raw_body.decode("utf-8")).items() if values}
+        action = fields.get("action")
+        appointment_id = fields.get("id")
+        if action not in APPOINTMENT_ACTIONS or not appointment_id:
+            return ok("Evento ignorado", {"action": action})
+
+        # Every delivery is processed: identical bodies can be two real changes. Deliveries of the
+        # same appointment run one at a time so each reads the mirror the previous one wrote.
+        lease_key = {"pk": f"appointment#{appointment_id}", "sk": "lease"}
+        owner = _acquire_lease(lease_key)
+        if owner is None:
+            # Acuity retries deliveries that fail
+            return make_response(HTTPStatus.SERVICE_UNAVAILABLE, {
+                "success": False,
+                "error": "La cita se está procesando; reintente",
+            })
+        try:
+            _sync_appointment(str(appointment_id))
+        finally:
+            _release_lease(lease_key, owner)
+        return ok("Evento procesado", {"action": action, "appointmentId": appointment_id})
+
+    except Exception:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        logger.error("*** xml tb_lineno: {}".format(exc_traceback.tb_lineno))
+        logger.error(traceback.format_exception(exc_type, exc_value, exc_traceback))
+        return internal_server_error("Ocurrió un error inesperado. Contacte a soporte")
+
+
+def verify_signature(raw_body: bytes, signature: Optional[str]) -> bool:
+    """
+    Checks X-Acuity-Signature: the base64 HMAC-SHA256 of the raw body keyed with the API key.
+    """
+    if not signature:
+        return False
+    secret = (os.environ.get("ACUITY_API_KEY") or "").encode("utf-8")
+    expected = base64.b64encode(hmac.new(secret, raw_body, hashlib.sha256).digest()).decode("ascii")
+    return hmac.compare_digest(expected, signature.strip())
+
+
+def _raw_body(event: Dict[str, Any]) -> bytes:
+    body = (event or {}).get("body") or ""
+    if (event or {}).get("isBase64Encoded"):
+        return base64.b64decode(body)
+    return body.encode("utf-8")
+
+
+def _header(event: Dict[str, Any], name: str) -> Optional[str]:
+    for key, value in ((event or {}).get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _acquire_lease(lease_key: Dict[str, str]) -> Optional[str]:
+    """
+    Takes the in-flight lease of an appointment with a conditional put, waiting
+    while another delivery holds it.
+
+    Returns:
+        str or None: The owner token to release the lease with, or None if it was
+        still held when the invocation ran out of time. Without DynamoDB the
+        delivery is processed unserialized.
+    """
+    owner = uuid.uuid4().hex
+    deadline = current_deadline.get()
+    while True:
+        now = int(time.time())
+        try:
+            coordination.table.put_item(
+                Item={**lease_key, "owner": owner, "expiresAt": now + SYNC_LEASE_SECONDS},
+                # DynamoDB deletes expired items lazily, so expiry is checked here too
+                ConditionExpression="attribute_not_exists(pk) OR expiresAt < :now",
+                ExpressionAttributeValues={":now": now},
+            )
+            return owner
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                logger.warning(f"No se pudo tomar el lease de la cita: {error}")
+                return owner
+        if deadline is not None and deadline.remaining() <= SYNC_LEASE_POLL_INTERVAL:
+            return None
+        time.sleep(SYNC_LEASE_POLL_INTERVAL)
+
+
+def _release_lease(lease_key: Dict[str, str], owner: str):
+    try:
+        coordination.table.delete_item(
+            Key=lease_key,
+            # A lease that expired and was taken by another delivery is left alone
+            ConditionExpression="#owner = :owner",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={":owner": owner},
+        )
+    except ClientError as error:
+        if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            logger.warning(f"No se pudo liberar el lease de la cita: {error}")
+
+
+def _sync_appointment(appointment_id: str):
+    """
+    Fetches the appointment once and propagates the change.
+
+    The mirror keeps the last known calendar and date of the appointment,
+    so a reschedule also invalidates the day it left. The affected days are
+    invalidated in the availability cache and rewritten in the materialized
+    view.
+    """
+    mirror_key = {"pk": f"appointment#{appointment_id}", "sk": "mirror"}
+    previous = coordination.table.get_item(Key=mirror_key, ConsistentRead=True).get("Item")
+    try:
+        appointment = acuity.get_appointment(appointment_id)
+    except HTTPError as http_err:
+        if http_err.response is None or http_err.response.status_code != 404:
+            raise
+        appointment = None
+
+    current = _snapshot(appointment) if appointment else None
+    affected = [snapshot for snapshot in (previous, current) if snapshot]
+    availability_cache.invalidate_appointments(*affected)
+    _refresh_view(affected)
+
+    if current:
+        starts_at = availability.slot_sort_key(current["datetime"])
+        expires_at = starts_at if starts_at != float("inf") else time.time()
+        coordination.table.put_item(Item={
+            **mirror_key,
+            **current,
+            "updatedAt": int(time.time() * 1000),
+            "expiresAt": int(expires_at + MIRROR_RETENTION_SECONDS),
+        })
+    elif previous:
+        coordination.table.delete_item(Key=mirror_key)
+
+
+def _snapshot(appointment: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "datetime": str(appointment.get("datetime") or ""),
+        "calendarID": str(appointment.get("calendarID") or ""),
+        "appointmentTypeID": str(appointment.get("appointmentTypeID") or ""),
+        "canceled": bool(appointment.get("canceled")),
+    }
+
+
+def _refresh_view(snapshots: List[Dict[str, Any]]):
+    """
+    Rewrites the materialized days touched by the appointment. Failures are only
+    logged: the days were already invalidated and fall back to live reads.
+    """
+    if view.repository is None:
+        return
+    days = {
+        (snapshot["calendarID"], snapshot["appointmentTypeID"], availability_cache.appointment_day(snapshot))
+        for snapshot in snapshots
+        if snapshot.get("calendarID") and snapshot.get("appointmentTypeID")
+    }
+    for calendar_id, type_id, day in days:
+        if not day:
+            continue
+        started = int(time.time() * 1000)
+        try:
+            slots = acuity.get_availability_times(day, type_id, calendar_id, MATERIALIZE_TIMEZONE)
+        except Exception as error:
+            logger.warning(f"No se pudo actualizar la disponibilidad materializada de {day}: {error}")
+            continue
+        view.put_day(calendar_id, type_id, MATERIALIZE_TIMEZONE, day, slots, started)
@@ -1,65 +1,87 @@
 import logging
 import os
+import re
 import sys
+import time
 import traceback
-from typing import Dict, Any, Optional
-import requests
+from typing import Dict, Any, Optional, Tuple
 
-import json
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-
-DEFAULT_TIMEOUT = 8  # seconds
-DEFAULT_API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-07")
-shop_domain = os.getenv("SHOPIFY_STORE_DOMAIN")
-storefront_token = os.getenv("SHOPIFY_STOREFRONT_ACCESS_TOKEN")
+from requests import HTTPError
 
+from db_user_links import DBUserLinks
+from deadline import with_deadline
+from session_store import SessionStore, hash_token
+from session_token import SessionTokenSigner, is_session_token
+from shopify_client import StorefrontClient, customer_context
+from ttl_cache import TTLCache
+from user_profile import link_profile
 
-SHOPIFY_CUSTOMER_QUERY = (
-    "query customerByToken($token: String!) { "
-    "customer(customerAccessToken: $token) { id email firstName lastName phone } "
-    "}"
-)
-
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
 
+shopify = StorefrontClient()
+# Runs during the init phase so the first request skips the TLS handshake
+shopify.warm()
+shop_domain = shopify.shop_domain
+
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL_SECONDS") or 300)
+AUTH_CACHE_MAX_SIZE = 2048
+# Validated tokens per container, keyed by the SHA-256 of the token so raw
+# tokens are never kept in memory; the value is the policy context.
+token_cache = TTLCache(max_size=AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL)
+# Shared by every authorizer container and pre-populated by customer-token
+sessions = SessionStore()
+# Optional signed session tokens minted by customer-token, verified with no network I/O
+signer = SessionTokenSigner()
+# Only read on the Shopify path: cached, stored and signed sessions already carry the profile
+db_links = DBUserLinks()
+
+# Tokens Shopify rejected, by hash, so retries of a bad token never reach Shopify again
+NEGATIVE_CACHE_TTL = float(os.environ.get("AUTH_NEGATIVE_CACHE_TTL_SECONDS") or 60)
+rejected_tokens = TTLCache(max_size=4096, ttl=NEGATIVE_CACHE_TTL)
+# Rejected attempts per source IP in a fixed window; over the limit the IP is denied outright
+IP_FAILURE_LIMIT = int(os.environ.get("AUTH_IP_FAILURE_LIMIT") or 20)
+IP_FAILURE_WINDOW = 60  # seconds
+ip_failures = TTLCache(max_size=4096, ttl=IP_FAILURE_WINDOW)
+# Shopify access tokens are hex; signed session tokens are base64url with dots
+TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9._~+/=-]{16,2048}$")
+
+
+@with_deadline
 def function_handler(event, context):
     try:
         print(event)
-        token = _extract_bearer_token(event.get("headers", {}) or {})
-        if not token:
-            return _unauthorized(event)
-
-        data = _shopify_graphql_request(shop_domain, storefront_token, token)
-        if not data:
-            return _unauthorized(event)
-
-        customer = (((data or {}).get("data") or {}).get("customer")) if isinstance(data, dict) else None
-        if not customer or not isinstance(customer, dict) or not customer.get("id"):
+        source_ip = _source_ip(event)
+        if _is_throttled(source_ip):
+            logger.warning(f"Demasiados intentos fallidos desde {source_ip}")
             return _unauthorized(event)
 
-        gid = str(customer.get("id"))
-        email = str(customer.get("email") or "")
-        first_name = str(customer.get("firstName") or "")
-        last_name = str(customer.get("lastName") or "")
-        phone = str(customer.get("phone") or "")
-        customer_id_num = parse_customer_gid(gid)
-        if customer_id_num == "anonymous":
-            return _unauthorized(event)
+        token = _extract_bearer_token(event.get("headers", {}) or {})
+        if not token:
+            return _reject(event, source_ip)
+
+        if is_session_token(token):
+            context_dict, _ = signer.verify(token, shop_domain)
+            if not context_dict:
+                return _reject(event, source_ip)
+            return build_policy(context_dict["shopifyCustomerId"], "Allow", "arn:aws:execute-api:*:*:*/*", context_dict)
+
+        token_hash = hash_token(token)
+        if rejected_tokens.get(token_hash):
+            return _reject(event, source_ip)
+        context_dict = token_cache.get(token_hash)
+        if context_dict is None:
+            context_dict, expires_at = sessions.get(token_hash)
+            if context_dict is None:
+                context_dict, rejected = _resolve_customer(token, token_hash)
+                if not context_dict:
+                    # Upstream failures say nothing about the token and do not count against the IP
+                    return _reject(event, source_ip) if rejected else _unauthorized(event)
+                expires_at = sessions.put(token_hash, context_dict)
+            token_cache.set(token_hash, context_dict, cache_ttl(expires_at))
 
-        # Build Allow policy with context
-        method_arn = event.get("methodArn", "*")
-        context_dict = {
-            "shopifyCustomerGID": gid,
-            "shopifyCustomerId": customer_id_num,
-            "email": email,
-            "firstName": first_name,
-            "lastName": last_name,
-            "phone": phone,
-            "shopDomain": shop_domain,
-            "tokenType": "shopify_customer_access_token",
-        }
         print("arn:aws:execute-api:*:*:*/*")
-        return build_policy(customer_id_num, "Allow", "arn:aws:execute-api:*:*:*/*", context_dict)
+        return build_policy(context_dict["shopifyCustomerId"], "Allow", "arn:aws:execute-api:*:*:*/*", context_dict)
     except Exception:
         exc_type, exc_value, exc_traceback = sys.exc_info()
         logger.error("Authorizer exception at line {}".format(exc_traceback.tb_lineno))
@@ -67,16 +89,62 @@ def function_handler(event, context):
         return _unauthorized(event)
 
 
-def parse_customer_gid(gid: Optional[str]) -> str:
-    try:
-        if not gid:
-            return "anonymous"
-        # Expected format: gid://shopify/Customer/123456789
-        parts = str(gid).strip().split("/")
-        num = parts[-1]
-        return str(int(num))  # normalize and validate numeric
-    except Exception:
-        return "anonymous"
+def cache_ttl(expires_at: Optional[float] = None) -> float:
+    """
+    Returns how long a validated token may be cached: AUTH_CACHE_TTL_SECONDS,
+    never past the token or session expiry (epoch seconds) when it is known.
+    """
+    if expires_at is None:
+        return AUTH_CACHE_TTL
+    return max(0.0, min(AUTH_CACHE_TTL, expires_at - time.time()))
+
+
+def _resolve_customer(token: str, token_hash: str) -> Tuple[Optional[Dict[str, str]], bool]:
+    """
+    Validates the token against Shopify and builds the policy context.
+
+    Only a definitive answer from Shopify (no customer for the token) is
+    negatively cached; network or upstream errors are not. A valid customer
+    gets its users_links profile added (see user_profile.link_profile) before
+    the context is stored as its session.
+
+    Returns:
+        tuple: The context for the Allow policy (None if the token could not be
+        validated), and whether Shopify definitively rejected the token.
+    """
+    data = _shopify_graphql_request(token)
+    if not data:
+        return None, False
+    context_dict = customer_context(data, shop_domain)
+    rejected = context_dict is None and data.get("data") is not None and not data.get("errors")
+    if rejected:
+        rejected_tokens.set(token_hash, True)
+    if context_dict:
+        context_dict = link_profile(db_links, context_dict)
+    return context_dict, rejected
+
+
+def _source_ip(event) -> str:
+    return str((((event or {}).get("requestContext") or {}).get("identity") or {}).get("sourceIp") or "")
+
+
+def _is_throttled(source_ip: str) -> bool:
+    entry = ip_failures.get(source_ip) if source_ip else None
+    return entry is not None and entry[1] >= IP_FAILURE_LIMIT
+
+
+def _reject(event, source_ip: str):
+    """
+    Denies the request and counts the failure for its source IP.
+
+    Only for definitive rejections (malformed header, bad signed token, negative
+    cache hit or no customer in Shopify), never for upstream failures.
+    """
+    if source_ip:
+        now = time.monotonic()
+        started, count = ip_failures.get(source_ip) or (now, 0)
+        ip_failures.set(source_ip, (started, count + 1), IP_FAILURE_WINDOW - (now - started))
+    return _unauthorized(event)
 
 
 def build_policy(principal_id: str, effect: str, resource_arn: str, context_dict: Dict[str, str]) -> Dict[str, Any]:
@@ -146,31 +214,23 @@ def _extract_bearer_token(headers) -> Optional[str]:
         authorization = headers.get('AUTHORIZATION')
 
     if authorization and len(authorization) > 0:
-        return authorization[7:]
+        # Cheap structural checks before any hashing, cache or network work
+        scheme, _, token = str(authorization).strip().partition(" ")
+        token = token.strip()
+        if scheme.lower() != "bearer" or not TOKEN_PATTERN.match(token):
+            return None
+        return token
     return None
 
 
-def _shopify_graphql_request(shop_domain: str, storefront_token: str, customer_token: str) -> Optional[Dict[str, Any]]:
-    url = f"https://{shop_domain}/api/{DEFAULT_API_VERSION}/graphql.json"
-    payload = {"query": SHOPIFY_CUSTOMER_QUERY, "variables": {"token": customer_token}}
-    body = json.dumps(payload).encode("utf-8")
-
-    headers = {
-        "Content-Type": "application/json",
-        "X-Shopify-Storefront-Access-Token": storefront_token,
-    }
-    timeout = DEFAULT_TIMEOUT
-
+def _shopify_graphql_request(customer_token: str) -> Optional[Dict[str, Any]]:
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=timeout)  # type: ignore
-        status = resp.status_code
-        text = resp.text
-
-        if status < 200 or status >= 300:
-            logger.error(f"Shopify GraphQL HTTP error: {status}")
-            return None
-        data = json.loads(text)
-        return data
+        # The customer query is read-only, so it is retried within the timeout budget
+        return shopify.get_customer(customer_token)
+    except HTTPError as http_err:
+        status = http_err.response.status_code if http_err.response is not None else None
+        logger.error(f"Shopify GraphQL HTTP error: {status}")
+        return None
     except Exception as e:
         logger.error(f"Error calling Shopify GraphQL: {e}")
         return None
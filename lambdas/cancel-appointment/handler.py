@@ -1,13 +1,14 @@
 import logging
-import os
 import sys
 import traceback
 from http import HTTPStatus
 
-import requests
 from requests import HTTPError
 from requests.exceptions import Timeout, ConnectionError as ReqConnectionError, RequestException
 
+import availability_cache
+from acuity_client import AcuityClient
+from deadline import with_deadline
 from http_utils import make_response, internal_server_error, bad_request, not_found
 from validation import validation
 from validation_model import RequestBody
@@ -15,19 +16,12 @@ from db_user_links import DBUserLinks
 
 logger = logging.getLogger()
 
-BASE_URL = "https://acuityscheduling.com/api/v1"
-DEFAULT_TIMEOUT = 10
-HEADERS = {
-    "Accept": "application/json",
-    "Content-Type": "application/json",
-    "User-Agent": "cancel-appointment-lambda/1.0",
-}
+acuity = AcuityClient("cancel-appointment-lambda/1.0")
 
-user_id = os.environ.get("ACUITY_USER_ID")
-api_key = os.environ.get("ACUITY_API_KEY")
 db_links = DBUserLinks()
 
 
+@with_deadline
 @validation
 def function_handler(event, __, request_body: RequestBody):
     try:
@@ -50,16 +44,7 @@ def function_handler(event, __, request_body: RequestBody):
         appointment_id = str(request_body.appointmentId)
         # 3) Validar propiedad de la cita por teléfono o email
         try:
-            get_resp = requests.get(
-                f"{BASE_URL}/appointments/{appointment_id}",
-                auth=(user_id, api_key),
-                headers=HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-            )
-            if get_resp.status_code == 404:
-                return not_found("La cita no existe")
-            get_resp.raise_for_status()
-            appt = get_resp.json() or {}
+            appt = acuity.get_appointment(appointment_id) or {}
 
             appt_phone = appt.get("phone")
             if appt_phone is None:
@@ -78,6 +63,8 @@ def function_handler(event, __, request_body: RequestBody):
                 return not_found("La cita no pertenece al usuario autenticado")
         except HTTPError as http_err:
             status = http_err.response.status_code if http_err.response is not None else 502
+            if status == 404:
+                return not_found("La cita no existe")
             content = _safe_content(http_err)
             return make_response(HTTPStatus.BAD_GATEWAY, {
                 "success": False,
@@ -104,20 +91,13 @@ def function_handler(event, __, request_body: RequestBody):
             payload["notifyClient"] = bool(request_body.notifyClient)
 
         try:
-            put_resp = requests.put(
-                f"{BASE_URL}/appointments/{appointment_id}/cancel",
-                json=payload if payload else {},
-                auth=(user_id, api_key),
-                headers=HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-            )
-            if put_resp.status_code == 404:
-                return not_found("No fue posible cancelar la cita")
-            put_resp.raise_for_status()
-            data = put_resp.json()
+            data = acuity.cancel_appointment(appointment_id, payload)
+            availability_cache.invalidate_appointments(appt)
             return make_response(HTTPStatus.OK, {"data": data, "meta": {"action": "cancel", "appointmentId": appointment_id}})
         except HTTPError as http_err:
             status = http_err.response.status_code if http_err.response is not None else 502
+            if status == 404:
+                return not_found("No fue posible cancelar la cita")
             content = _safe_content(http_err)
             return make_response(HTTPStatus.BAD_GATEWAY, {
                 "success": False,
@@ -1,14 +1,16 @@
 import logging
-import os
 import sys
 import traceback
 from http import HTTPStatus
 from typing import Any, Dict
 
-import requests
 from requests import HTTPError
 from requests.exceptions import Timeout, ConnectionError as ReqConnectionError, RequestException
 
+import availability_cache
+from acuity_client import AcuityClient
+from deadline import with_deadline
+from ttl_cache import TTLCache
 from http_utils import make_response, internal_server_error, bad_request
 from validation import validation
 from validation_model import RequestBody
@@ -16,19 +18,13 @@ from db_user_links import DBUserLinks
 
 logger = logging.getLogger()
 
-BASE_URL = "https://acuityscheduling.com/api/v1"
-DEFAULT_TIMEOUT = 10
-HEADERS = {
-    "Accept": "application/json",
-    "Content-Type": "application/json",
-    "User-Agent": "create-appointment-lambda/1.0",
-}
-
-user_id = os.environ.get("ACUITY_USER_ID")
-api_key = os.environ.get("ACUITY_API_KEY")
+acuity = AcuityClient("create-appointment-lambda/1.0")
 db_links = DBUserLinks()
+# Profiles this container already stored, so repeated bookings skip users_links
+known_profiles = TTLCache(max_size=1024, ttl=300)
 
 
+@with_deadline
 @validation
 def function_handler(event, __, request_body: RequestBody):
     try:
@@ -46,16 +42,20 @@ def function_handler(event, __, request_body: RequestBody):
             return bad_request("Debe proporcionar al menos un identificador del usuario (teléfono o email)")
 
         # Guardar/actualizar perfil del usuario en Dynamo sin acuityClientId
-        if shopify_customer_id:
+        # (el authorizer ya lo hizo si profileLinked es "true")
+        profile = {
+            "email": email,
+            "shopDomain": shop_domain or "",
+            "firstName": first_name or "",
+            "lastName": last_name or "",
+            "phone": phone or "",
+        }
+        linked = auth_ctx.get("profileLinked") == "true"
+        if shopify_customer_id and not linked and known_profiles.get(shopify_customer_id) != profile:
             existing = db_links.get({"customerId": str(shopify_customer_id), "profile": "les-aimants"})
             if not existing:
-                db_links.upsert_profile(shopify_customer_id, {
-                    "email": email,
-                    "shopDomain": shop_domain or "",
-                    "firstName": first_name or "",
-                    "lastName": last_name or "",
-                    "phone": phone or "",
-                })
+                db_links.upsert_profile(shopify_customer_id, profile)
+            known_profiles.set(shopify_customer_id, profile)
 
         # Crear cita. Incluir datos del cliente si están disponibles
         appointment_payload: Dict[str, Any] = {
@@ -78,15 +78,8 @@ def function_handler(event, __, request_body: RequestBody):
             appointment_payload["phone"] = phone
 
         try:
-            a_resp = requests.post(
-                f"{BASE_URL}/appointments",
-                json=appointment_payload,
-                auth=(user_id, api_key),
-                headers=HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-            )
-            a_resp.raise_for_status()
-            a_data = a_resp.json()
+            a_data = acuity.create_appointment(appointment_payload)
+            availability_cache.invalidate_appointments(a_data or appointment_payload)
             # 201 created
             return make_response(HTTPStatus.CREATED, {"data": a_data})
         except HTTPError as http_err:
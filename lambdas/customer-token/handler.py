@@ -1,55 +1,40 @@
 import logging
-import os
 import sys
 import traceback
+from datetime import datetime, timezone
 from http import HTTPStatus
+from typing import Dict, Optional
 
-import requests
 from requests import HTTPError
 from requests.exceptions import Timeout, ConnectionError as ReqConnectionError, RequestException
 
+from db_user_links import DBUserLinks
+from deadline import with_deadline
 from http_utils import make_response, internal_server_error
+from session_store import SessionStore, hash_token, parse_expiry
+from session_token import SessionTokenSigner
+from shopify_client import StorefrontClient, customer_context
+from user_profile import link_profile
 from validation import validation
 from validation_model import RequestBody
 
 logger = logging.getLogger()
 
-DEFAULT_TIMEOUT = 8
-DEFAULT_API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-07")
-shop_domain = os.getenv("SHOPIFY_STORE_DOMAIN")
-storefront_token = os.getenv("SHOPIFY_STOREFRONT_ACCESS_TOKEN")
-HEADERS = {
-    "Content-Type": "application/json",
-    "X-Shopify-Storefront-Access-Token": storefront_token,
-}
-
-MUTATION = (
-    "mutation customerAccessTokenCreate($input: CustomerAccessTokenCreateInput!) { "
-    "customerAccessTokenCreate(input: $input) { "
-    "customerAccessToken { accessToken expiresAt } "
-    "userErrors { message } "
-    "} "
-    "}"
-)
+shopify = StorefrontClient()
+# Runs during the init phase so the login request skips the TLS handshake
+shopify.warm()
+sessions = SessionStore()
+signer = SessionTokenSigner()
+db_links = DBUserLinks()
 
 
+@with_deadline
 @validation
 def function_handler(event, __, request_body: RequestBody):
     try:
-        # Build endpoint and payload
-        endpoint = f"https://{shop_domain}/api/{DEFAULT_API_VERSION}/graphql.json"
-        payload = {
-            "query": MUTATION,
-            "variables": {
-                "input": {
-                    "email": request_body.email,
-                    "password": request_body.password,
-                }
-            },
-        }
-
         try:
-            resp = requests.post(endpoint, json=payload, headers=HEADERS, timeout=DEFAULT_TIMEOUT)
+            # customerAccessTokenCreate is a mutation: only retried when Shopify did not apply it
+            resp = shopify.create_customer_access_token(request_body.email, request_body.password)
             # We treat non-2xx as upstream errors
             resp.raise_for_status()
             data = resp.json() or {}
@@ -65,10 +50,19 @@ def function_handler(event, __, request_body: RequestBody):
             access_token = token_obj.get("accessToken")
             expires_at = token_obj.get("expiresAt")
             if access_token and expires_at:
-                return make_response(HTTPStatus.OK, {
+                body = {
                     "accessToken": access_token,
                     "expiresAt": expires_at,
-                })
+                }
+                customer = _store_session(access_token, expires_at)
+                if customer and signer.enabled:
+                    # Signed token the authorizer verifies locally, without Shopify
+                    session_token, session_expires_at = signer.mint(customer, parse_expiry(expires_at))
+                    body["sessionToken"] = session_token
+                    body["sessionExpiresAt"] = (
+                        datetime.fromtimestamp(session_expires_at, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+                    )
+                return make_response(HTTPStatus.OK, body)
             # No token and no explicit userErrors: treat as invalid credentials
             return make_response(HTTPStatus.UNAUTHORIZED, {
                 "success": False,
@@ -100,6 +94,27 @@ def function_handler(event, __, request_body: RequestBody):
         return internal_server_error("Ocurrió un error inesperado. Contacte a soporte")
 
 
+def _store_session(access_token: str, expires_at: str) -> Optional[Dict[str, str]]:
+    """
+    Resolves the customer of a new token and its users_links profile, and
+    stores its session, so the first authenticated request is authorized
+    without calling Shopify or DynamoDB. Failures are only logged: the
+    authorizer falls back to Shopify.
+
+    Returns:
+        dict or None: The customer context, or None if it could not be resolved.
+    """
+    try:
+        context = customer_context(shopify.get_customer(access_token), shopify.shop_domain)
+        if context:
+            context = link_profile(db_links, context)
+            sessions.put(hash_token(access_token), context, parse_expiry(expires_at))
+        return context
+    except Exception as error:
+        logger.warning(f"No se pudo registrar la sesión del cliente: {error}")
+        return None
+
+
 def _safe_content(http_err: HTTPError):
     try:
         if http_err.response is not None:
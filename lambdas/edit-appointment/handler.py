@@ -1,13 +1,15 @@
 import logging
-import os
 import sys
 import traceback
 from http import HTTPStatus
 
-import requests
 from requests import HTTPError
 from requests.exceptions import Timeout, ConnectionError as ReqConnectionError, RequestException
 
+import availability_cache
+from acuity_client import AcuityClient
+from deadline import with_deadline
+from ttl_cache import TTLCache
 from http_utils import make_response, internal_server_error, bad_request, not_found
 from validation import validation
 from validation_model import RequestBody
@@ -15,20 +17,15 @@ from db_user_links import DBUserLinks
 
 logger = logging.getLogger()
 
-BASE_URL = "https://acuityscheduling.com/api/v1"
-DEFAULT_TIMEOUT = 10
-HEADERS = {
-    "Accept": "application/json",
-    "Content-Type": "application/json",
-    "User-Agent": "edit-appointment-lambda/1.0",
-}
+acuity = AcuityClient("edit-appointment-lambda/1.0")
 
 
-user_id = os.environ.get("ACUITY_USER_ID")
-api_key = os.environ.get("ACUITY_API_KEY")
 db_links = DBUserLinks()
+# Profiles this container already stored, so repeated edits skip the users_links write
+known_profiles = TTLCache(max_size=1024, ttl=300)
 
 
+@with_deadline
 @validation
 def function_handler(event, __, request_body: RequestBody):
     try:
@@ -52,27 +49,22 @@ def function_handler(event, __, request_body: RequestBody):
         action = request_body.action
 
         # 2) Guardar/actualizar perfil en Dynamo sin acuityClientId
-        if shopify_customer_id:
-            db_links.upsert_profile(shopify_customer_id, {
-                "email": email,
-                "shopDomain": shop_domain or "",
-                "firstName": first_name or "",
-                "lastName": last_name or "",
-                "phone": phone or "",
-            })
+        # (el authorizer ya lo hizo si profileLinked es "true")
+        profile = {
+            "email": email,
+            "shopDomain": shop_domain or "",
+            "firstName": first_name or "",
+            "lastName": last_name or "",
+            "phone": phone or "",
+        }
+        linked = auth_ctx.get("profileLinked") == "true"
+        if shopify_customer_id and not linked and known_profiles.get(shopify_customer_id) != profile:
+            db_links.upsert_profile(shopify_customer_id, profile)
+            known_profiles.set(shopify_customer_id, profile)
 
         # 3) Validar propiedad de la cita por teléfono o email
         try:
-            get_resp = requests.get(
-                f"{BASE_URL}/appointments/{appointment_id}",
-                auth=(user_id, api_key),
-                headers=HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-            )
-            if get_resp.status_code == 404:
-                return not_found("La cita no existe")
-            get_resp.raise_for_status()
-            appt = get_resp.json() or {}
+            appt = acuity.get_appointment(appointment_id) or {}
 
             # Extraer datos del cliente de la cita (defensivo)
             appt_phone = appt.get("phone")
@@ -93,6 +85,8 @@ def function_handler(event, __, request_body: RequestBody):
                 return not_found("La cita no pertenece al usuario autenticado")
         except HTTPError as http_err:
             status = http_err.response.status_code if http_err.response is not None else 502
+            if status == 404:
+                return not_found("La cita no existe")
             content = _safe_content(http_err)
             return make_response(HTTPStatus.BAD_GATEWAY, {
                 "success": False,
@@ -125,20 +119,14 @@ def function_handler(event, __, request_body: RequestBody):
                 payload["timezone"] = request_body.timezone
 
             try:
-                put_resp = requests.put(
-                    f"{BASE_URL}/appointments/{appointment_id}/reschedule",
-                    json=payload,
-                    auth=(user_id, api_key),
-                    headers=HEADERS,
-                    timeout=DEFAULT_TIMEOUT,
-                )
-                if put_resp.status_code == 404:
-                    return not_found("No fue posible reprogramar la cita")
-                put_resp.raise_for_status()
-                data = put_resp.json()
+                data = acuity.reschedule_appointment(appointment_id, payload)
+                # Frees the old slot and takes the new one
+                availability_cache.invalidate_appointments(appt, data or {"calendarID": appt.get("calendarID"), **payload})
                 return make_response(HTTPStatus.OK, {"data": data, "meta": {"action": "reschedule", "appointmentId": appointment_id}})
             except HTTPError as http_err:
                 status = http_err.response.status_code if http_err.response is not None else 502
+                if status == 404:
+                    return not_found("No fue posible reprogramar la cita")
                 content = _safe_content(http_err)
                 return make_response(HTTPStatus.BAD_GATEWAY, {
                     "success": False,
@@ -171,20 +159,12 @@ def function_handler(event, __, request_body: RequestBody):
                 payload["admin"] = True
 
             try:
-                put_resp = requests.put(
-                    f"{BASE_URL}/appointments/{appointment_id}",
-                    json=payload,
-                    auth=(user_id, api_key),
-                    headers=HEADERS,
-                    timeout=DEFAULT_TIMEOUT,
-                )
-                if put_resp.status_code == 404:
-                    return not_found("No existe la cita o no hay cambios que aplicar")
-                put_resp.raise_for_status()
-                data = put_resp.json()
+                data = acuity.update_appointment(appointment_id, payload)
                 return make_response(HTTPStatus.OK, {"data": data, "meta": {"action": "update", "appointmentId": appointment_id}})
             except HTTPError as http_err:
                 status = http_err.response.status_code if http_err.response is not None else 502
+                if status == 404:
+                    return not_found("No existe la cita o no hay cambios que aplicar")
                 content = _safe_content(http_err)
                 return make_response(HTTPStatus.BAD_GATEWAY, {
                     "success": False,
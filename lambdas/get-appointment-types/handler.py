@@ -1,42 +1,25 @@
 import logging
-import os
 import sys
 import traceback
 from http import HTTPStatus
 
-import requests
 from requests import HTTPError
 from requests.exceptions import Timeout, ConnectionError as ReqConnectionError, RequestException
 
+import catalog
+from acuity_client import AcuityClient
+from deadline import with_deadline
 from http_utils import make_response, internal_server_error
 
 logger = logging.getLogger()
 
-# Constants per spec
-BASE_URL = "https://acuityscheduling.com/api/v1"
-DEFAULT_TIMEOUT = 10
-HEADERS = {
-    "Accept": "application/json",
-    "User-Agent": "get-appointment-types-lambda/1.0",
-}
+acuity = AcuityClient("get-appointment-types-lambda/1.0")
 
+@with_deadline
 def function_handler(_, __):
     try:
-        # Credentials are assumed to be present in env variables
-        user_id = os.environ["ACUITY_USER_ID"]
-        api_key = os.environ["ACUITY_API_KEY"]
-
-        url = f"{BASE_URL}/appointment-types"
-
         try:
-            response = requests.get(
-                url,
-                auth=(user_id, api_key),
-                headers=HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = catalog.get_appointment_types(acuity)
             return make_response(
                 HTTPStatus.OK,
                 {"data": data, "meta": {"resource": "appointment-types"}},
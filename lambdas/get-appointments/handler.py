@@ -1,35 +1,31 @@
 import logging
-import os
 import sys
 import traceback
+from datetime import timedelta
 from http import HTTPStatus
+from typing import Any, Dict, List, Optional
 
-import requests
 from requests import HTTPError
 from requests.exceptions import Timeout, ConnectionError as ReqConnectionError, RequestException
 
+import availability
+import availability_cache
+from acuity_client import AcuityClient
+from deadline import with_deadline
 from http_utils import make_response, internal_server_error, bad_request
 from validation import validation
 from validation_model import RequestBody
 
 logger = logging.getLogger()
 
-BASE_URL = "https://acuityscheduling.com/api/v1"
-DEFAULT_TIMEOUT = 10
-HEADERS = {
-    "Accept": "application/json",
-    "User-Agent": "get-appointments-lambda/1.0",
-}
+acuity = AcuityClient("get-appointments-lambda/1.0")
 
 
+@with_deadline
 @validation
 def function_handler(_, __, request_body: RequestBody):
     try:
-        user_id = os.environ.get("ACUITY_USER_ID")
-        api_key = os.environ.get("ACUITY_API_KEY")
         resource = request_body.resource
-        params = {}
-        url = BASE_URL
 
         if resource == "appointments":
             # validate required
@@ -43,11 +39,12 @@ def function_handler(_, __, request_body: RequestBody):
             if not _is_valid_date(request_body.start_date) or not _is_valid_date(request_body.end_date):
                 return bad_request("Formato de fecha inválido. Use YYYY-MM-DD en start_date y end_date")
 
-            url += "/appointments"
             params = {
                 "minDate": request_body.start_date,
                 "maxDate": request_body.end_date,
             }
+            if isinstance(request_body.calendarId, list) or isinstance(request_body.appointmentTypeId, list):
+                return bad_request("calendarId y appointmentTypeId solo aceptan listas con resource 'availability'")
             if request_body.calendarId is not None:
                 params["calendarID"] = request_body.calendarId
             if request_body.appointmentTypeId is not None:
@@ -57,31 +54,46 @@ def function_handler(_, __, request_body: RequestBody):
             if request_body.page is not None:
                 params["page"] = request_body.page
 
+            def load():
+                return acuity.request_json("GET", "/appointments", params=params)
+
         elif resource == "availability":
+            calendar_ids = availability.as_list(request_body.calendarId)
+            appointment_type_ids = availability.as_list(request_body.appointmentTypeId)
+            if len(calendar_ids) * len(appointment_type_ids) > availability.MAX_COMBINATIONS:
+                return bad_request(
+                    f"Demasiadas combinaciones de calendarId y appointmentTypeId (máximo {availability.MAX_COMBINATIONS})"
+                )
+            # The compact grid carries only counts, not which calendar or type each slot belongs to
+            if request_body.format == "compact" and len(calendar_ids) * len(appointment_type_ids) > 1:
+                return bad_request("El formato compacto solo admite un calendarId y un appointmentTypeId")
+            if not request_body.date and request_body.start_date and request_body.end_date:
+                return _availability_range(request_body, appointment_type_ids, calendar_ids)
             if not request_body.date:
-                return bad_request("Parámetro faltante: date")
+                return bad_request("Parámetro faltante: date (o start_date y end_date)")
             if not _is_valid_date(request_body.date):
                 return bad_request("Formato de fecha inválido. Use YYYY-MM-DD en date")
+            if len(calendar_ids) > 1 or len(appointment_type_ids) > 1:
+                return _availability_merged(request_body, appointment_type_ids, calendar_ids)
 
-            url += "/availability/times"
-            params = {
-                "date": request_body.date,
-            }
-            if request_body.calendarId is not None:
-                params["calendarID"] = request_body.calendarId
-            if request_body.appointmentTypeId is not None:
-                params["appointmentTypeID"] = request_body.appointmentTypeId
-            if request_body.timezone is not None:
-                params["timezone"] = request_body.timezone
+            # Served from the availability cache; slow upstream reads get a hedged copy
+            def load():
+                return availability_cache.get_times(
+                    acuity, request_body.date, appointment_type_ids[0], calendar_ids[0], request_body.timezone, hedge=True
+                )
+
+        elif resource == "next-available":
+            return _next_available(request_body)
         else:
-            return bad_request("Valor de 'resource' inválido. Use 'appointments' o 'availability'")
+            return bad_request("Valor de 'resource' inválido. Use 'appointments', 'availability' o 'next-available'")
 
         try:
-            response = requests.get(url, params=params, auth=(user_id, api_key), headers=HEADERS, timeout=DEFAULT_TIMEOUT)
-            # raise for status to catch as HTTPError
-            response.raise_for_status()
-            data = response.json()
-            return make_response(HTTPStatus.OK, {"data": data, "meta": {"resource": resource}})
+            data = load()
+            meta = {"resource": resource}
+            if resource == "availability" and request_body.format == "compact":
+                data = availability.encode_compact(data)
+                meta["format"] = "compact"
+            return make_response(HTTPStatus.OK, {"data": data, "meta": meta})
         except HTTPError as http_err:
             status = http_err.response.status_code if http_err.response is not None else 502
             content = None
@@ -118,6 +130,122 @@ def function_handler(_, __, request_body: RequestBody):
         return internal_server_error("Ocurrió un error inesperado. Contacte a soporte")
 
 
+def _availability_merged(request_body: RequestBody, appointment_type_ids: List[Optional[str]], calendar_ids: List[Optional[str]]):
+    """
+    Availability of one day across several calendars and/or appointment types.
+
+    Every combination is fetched concurrently and merged into one sorted
+    timeline, so "first available with anyone" is a single request.
+    """
+    days, errors = availability.fetch_slots(
+        acuity, [request_body.date], appointment_type_ids, calendar_ids, request_body.timezone
+    )
+    if not days:
+        return _upstream_errors(errors)
+    meta = {
+        "resource": "availability",
+        "calendarIDs": calendar_ids,
+        "appointmentTypeIDs": appointment_type_ids,
+        "firstAvailable": availability.first_available(days),
+    }
+    return make_response(HTTPStatus.OK, {"data": days[request_body.date], "errors": errors, "meta": meta})
+
+
+def _availability_range(request_body: RequestBody, appointment_type_ids: List[Optional[str]], calendar_ids: List[Optional[str]]):
+    """
+    Availability for every day from start_date to end_date in one round trip.
+
+    Days (and calendar / appointment type combinations) are fetched
+    concurrently; calls that fail are reported in "errors" while the rest
+    are still returned.
+    """
+    if not _is_valid_date(request_body.start_date) or not _is_valid_date(request_body.end_date):
+        return bad_request("Formato de fecha inválido. Use YYYY-MM-DD en start_date y end_date")
+    try:
+        dates = availability.date_range(request_body.start_date, request_body.end_date)
+    except ValueError:
+        return bad_request("Rango de fechas inválido: end_date debe ser igual o posterior a start_date")
+    if len(dates) > availability.MAX_RANGE_DAYS:
+        return bad_request(f"El rango no puede exceder {availability.MAX_RANGE_DAYS} días")
+    if len(dates) * len(appointment_type_ids) * len(calendar_ids) > availability.MAX_UPSTREAM_CALLS:
+        return bad_request(
+            f"La consulta requiere demasiadas llamadas a Acuity (máximo {availability.MAX_UPSTREAM_CALLS}); "
+            "reduzca el rango o las combinaciones"
+        )
+
+    # Days without openings in Acuity's month summary are answered without fetching their times
+    days, errors = availability.fetch_slots(
+        acuity, dates, appointment_type_ids, calendar_ids, request_body.timezone, prune=len(dates) > 1
+    )
+    if not days:
+        return _upstream_errors(errors)
+    meta = {
+        "resource": "availability",
+        "start_date": request_body.start_date,
+        "end_date": request_body.end_date,
+    }
+    if len(appointment_type_ids) * len(calendar_ids) > 1:
+        meta.update({
+            "calendarIDs": calendar_ids,
+            "appointmentTypeIDs": appointment_type_ids,
+            "firstAvailable": availability.first_available(days),
+        })
+    if request_body.format == "compact":
+        days = {day: availability.encode_compact(slots) for day, slots in days.items()}
+        meta["format"] = "compact"
+    return make_response(HTTPStatus.OK, {"data": days, "errors": errors, "meta": meta})
+
+
+def _next_available(request_body: RequestBody):
+    """
+    The earliest open slot from start_date (default: today) up to end_date
+    (default: NEXT_AVAILABLE_HORIZON_DAYS ahead), across every given calendar.
+    """
+    appointment_type_ids = availability.as_list(request_body.appointmentTypeId)
+    calendar_ids = availability.as_list(request_body.calendarId)
+    if appointment_type_ids == [None]:
+        return bad_request("Parámetro faltante: appointmentTypeId")
+    if len(calendar_ids) * len(appointment_type_ids) > availability.MAX_COMBINATIONS:
+        return bad_request(
+            f"Demasiadas combinaciones de calendarId y appointmentTypeId (máximo {availability.MAX_COMBINATIONS})"
+        )
+    start_date = request_body.start_date or availability.today(request_body.timezone)
+    if not _is_valid_date(start_date) or (request_body.end_date and not _is_valid_date(request_body.end_date)):
+        return bad_request("Formato de fecha inválido. Use YYYY-MM-DD en start_date y end_date")
+    try:
+        horizon = availability.parse_date(start_date) + timedelta(days=availability.NEXT_AVAILABLE_HORIZON_DAYS)
+        end_date = request_body.end_date or horizon.isoformat()
+        if availability.parse_date(end_date) > horizon:
+            return bad_request(f"El rango no puede exceder {availability.NEXT_AVAILABLE_HORIZON_DAYS} días")
+        slot, stats, errors = availability.find_next_available(
+            acuity, start_date, end_date, appointment_type_ids, calendar_ids, request_body.timezone
+        )
+    except ValueError:
+        return bad_request("Rango de fechas inválido: end_date debe ser igual o posterior a start_date")
+
+    # A failed call could hide an earlier slot (or any slot): the answer is unknown, not "no openings"
+    if not stats.pop("confirmed"):
+        return _upstream_errors(errors)
+    return make_response(HTTPStatus.OK, {
+        "data": slot,
+        "errors": errors,
+        "meta": {
+            "resource": "next-available",
+            "start_date": start_date,
+            "end_date": end_date,
+            **stats,
+        },
+    })
+
+
+def _upstream_errors(errors: List[Dict[str, Any]]):
+    return make_response(HTTPStatus.BAD_GATEWAY, {
+        "success": False,
+        "error": "Error al consultar el API de Acuity",
+        "errors": errors,
+    })
+
+
 def _is_valid_date(yyyy_mm_dd: str) -> bool:
     try:
         # simple validation to avoid extra deps
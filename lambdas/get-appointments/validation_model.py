@@ -1,14 +1,17 @@
-from typing import Optional, Literal
+from typing import List, Optional, Literal, Union
 from pydantic import BaseModel
 
 
 class RequestBody(BaseModel):
-    resource: Literal["appointments", "availability"]
+    resource: Literal["appointments", "availability", "next-available"]
     start_date: Optional[str] = None
     end_date: Optional[str] = None
     date: Optional[str] = None
-    calendarId: Optional[str] = None
-    appointmentTypeId: Optional[str] = None
+    # availability accepts lists to aggregate several calendars / appointment types
+    calendarId: Optional[Union[str, List[str]]] = None
+    appointmentTypeId: Optional[Union[str, List[str]]] = None
     timezone: Optional[str] = None
     limit: Optional[int] = None
     page: Optional[int] = None
+    # availability only: "compact" packs each day as start, granularity and base64 slot counts
+    format: Optional[Literal["default", "compact"]] = None
@@ -1,13 +1,13 @@
 import logging
-import os
 import sys
 import traceback
 from http import HTTPStatus
 
-import requests
 from requests import HTTPError
 from requests.exceptions import Timeout, ConnectionError as ReqConnectionError, RequestException
 
+from acuity_client import AcuityClient
+from deadline import with_deadline
 from http_utils import make_response, internal_server_error, bad_request, not_found
 from validation import validation
 from validation_model import RequestBody
@@ -15,19 +15,11 @@ from db_user_links import DBUserLinks
 
 logger = logging.getLogger()
 
-BASE_URL = "https://acuityscheduling.com/api/v1"
-DEFAULT_TIMEOUT = 10
-HEADERS = {
-    "Accept": "application/json",
-    "User-Agent": "get-user-appointments-lambda/1.0",
-}
-
-
-user_id = os.environ.get("ACUITY_USER_ID")
-api_key = os.environ.get("ACUITY_API_KEY")
+acuity = AcuityClient("get-user-appointments-lambda/1.0")
 db_links = DBUserLinks()
 
 
+@with_deadline
 @validation
 def function_handler(event, __, request_body: RequestBody):
     try:
@@ -66,15 +58,7 @@ def function_handler(event, __, request_body: RequestBody):
             params["appointmentTypeID"] = request_body.appointmentTypeId
 
         try:
-            a_resp = requests.get(
-                f"{BASE_URL}/appointments",
-                params=params,
-                auth=(user_id, api_key),
-                headers=HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-            )
-            a_resp.raise_for_status()
-            data = a_resp.json() or []
+            data = acuity.get_appointments(params) or []
             if isinstance(data, list) and len(data) == 0:
                 return not_found("No se encontraron citas para el usuario")
             return make_response(HTTPStatus.OK, {"data": data, "meta": {"resource": "user-appointments"}})
@@ -0,0 +1,55 @@
+import logging
+import os
+import sys
+import traceback
+from datetime import timedelta
+
+import availability
+import catalog
+from acuity_client import AcuityClient
+from availability_store import AvailabilityStore
+from deadline import Deadline, deadline_scope
+from rate_limiter import BACKGROUND
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+MATERIALIZE_DAYS = int(os.environ.get("MATERIALIZE_DAYS") or 14)
+MATERIALIZE_TIMEZONE = os.environ.get("MATERIALIZE_TIMEZONE") or None
+MAX_RUNTIME = 840.0  # seconds, below the 15 minute Lambda limit
+WRITE_MARGIN = 20.0  # seconds kept to write what was fetched before the function times out
+
+# Background priority: the job only uses quota that live traffic leaves idle
+acuity = AcuityClient("materialize-availability-lambda/1.0", read_priority=BACKGROUND)
+store = AvailabilityStore()
+
+
+def function_handler(_, context):
+    """
+    Scheduled job: precomputes the availability of the next MATERIALIZE_DAYS days
+    for every bookable calendar and appointment type.
+    """
+    try:
+        start = availability.parse_date(availability.today(MATERIALIZE_TIMEZONE))
+        dates = [(start + timedelta(days=offset)).isoformat() for offset in range(MATERIALIZE_DAYS)]
+
+        # Upstream reads stop early enough to store whatever was fetched
+        with deadline_scope(Deadline.from_context(context, margin=WRITE_MARGIN, cap=MAX_RUNTIME)):
+            combinations = availability.bookable_combinations(
+                catalog.get_calendars(acuity), catalog.get_appointment_types(acuity)
+            )
+            items, stats = availability.collect_days(acuity, combinations, dates, MATERIALIZE_TIMEZONE)
+
+        written = store.put_days(items)
+        logger.info(
+            f"Disponibilidad materializada: {written} días de {stats['combinations']} combinaciones "
+            f"({stats['probed']} consultados, {stats['errors']} errores)"
+        )
+        return {"written": written, **stats}
+
+    except Exception:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        logger.error("*** xml tb_lineno: {}".format(exc_traceback.tb_lineno))
+        logger.error(traceback.format_exception(exc_type, exc_value, exc_traceback))
+        # Let the scheduled invocation fail so it shows up in the Lambda error metrics
+        raise
@@ -0,0 +1,98 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+from acuity_client import AcuityClient, POOL_MAXSIZE
+
+logger = logging.getLogger()
+
+DEFAULT_CONCURRENCY = 8
+
+# Shared across warm invocations; sized to the HTTP pool so no worker ever
+# waits for (or discards) a pooled connection.
+executor = ThreadPoolExecutor(max_workers=POOL_MAXSIZE, thread_name_prefix="acuity")
+
+
+class AsyncAcuityClient:
+    def __init__(self, client: Optional[AcuityClient], max_concurrency: int = DEFAULT_CONCURRENCY):
+        """
+        Initializes an AsyncAcuityClient instance.
+
+        The blocking AcuityClient calls run on a shared thread pool so they reuse
+        the same pooled session as the sync path. Create one instance per event
+        loop (i.e. inside the coroutine given to asyncio.run).
+
+        Args:
+            client (AcuityClient, optional): The sync client whose session and policies are reused.
+            max_concurrency (int): Maximum number of in-flight upstream calls.
+
+        Returns:
+            None
+        """
+        self.client = client
+        self.semaphore = asyncio.Semaphore(max(1, min(max_concurrency, POOL_MAXSIZE)))
+
+    async def call(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs a blocking call on the shared executor, bounded by the semaphore.
+
+        Any AcuityClient method can be passed as is (e.g. self.client.get_calendars),
+        so its signature is never duplicated here.
+
+        Args:
+            function (Callable): The blocking function to run.
+            *args: Positional arguments for the function.
+            **kwargs: Keyword arguments for the function.
+
+        Returns:
+            Any: The function result.
+        """
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                executor, functools.partial(context.run, function, *args, **kwargs)
+            )
+
+
+async def gather_bounded(
+    calls: Iterable[Callable[[], Any]], max_concurrency: int = DEFAULT_CONCURRENCY
+) -> List[Any]:
+    """
+    Runs independent blocking calls concurrently with bounded concurrency.
+
+    Args:
+        calls (Iterable[Callable]): Zero-argument callables (e.g. lambdas over AcuityClient methods).
+        max_concurrency (int): Maximum number of in-flight calls.
+
+    Returns:
+        List[Any]: One entry per call, in order. Failed calls hold their exception.
+    """
+    runner = AsyncAcuityClient(None, max_concurrency)
+    return await asyncio.gather(
+        *(runner.call(call) for call in calls), return_exceptions=True
+    )
+
+
+def run_concurrently(
+    calls: Iterable[Callable[[], Any]], max_concurrency: int = DEFAULT_CONCURRENCY
+) -> List[Any]:
+    """
+    Synchronous adapter for function_handler entry points.
+
+    Total latency is the slowest call instead of the sum of all of them.
+
+    Args:
+        calls (Iterable[Callable]): Zero-argument callables to run in parallel.
+        max_concurrency (int): Maximum number of in-flight calls.
+
+    Returns:
+        List[Any]: One entry per call, in order. Failed calls hold their exception.
+    """
+    calls = list(calls)
+    if not calls:
+        return []
+    return asyncio.run(gather_bounded(calls, max_concurrency))
@@ -0,0 +1,293 @@
+import hashlib
+import logging
+import os
+from typing import Any, Dict, List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import CircuitBreaker, get_breaker
+from hedging import Hedger, get_hedger
+from rate_limiter import MUTATION, READ, RateLimiter, get_rate_limiter
+from retry_policy import RetryPolicy
+from singleflight import SingleFlight, get_singleflight, make_key
+from ttl_cache import TTLCache
+
+logger = logging.getLogger()
+
+BASE_URL = "https://acuityscheduling.com/api/v1"
+DEFAULT_TIMEOUT = 10  # seconds
+POOL_CONNECTIONS = 2
+POOL_MAXSIZE = 16
+HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+    "Connection": "keep-alive",
+}
+VALIDATORS_MAX_SIZE = 128
+VALIDATORS_TTL = 3600  # seconds
+
+
+def _build_session() -> requests.Session:
+    """
+    Builds the module-global session used for every Acuity call.
+
+    The session lives for the whole container, so warm invocations reuse the
+    already-open TCP/TLS connections kept by the adapter pool.
+
+    Returns:
+        requests.Session: A session with a tuned HTTPAdapter mounted for https.
+    """
+    http_session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=0,
+    )
+    http_session.mount("https://", adapter)
+    http_session.headers.update(HEADERS)
+    http_session.auth = (
+        os.environ.get("ACUITY_USER_ID"),
+        os.environ.get("ACUITY_API_KEY"),
+    )
+    return http_session
+
+
+session = _build_session()
+# Last body seen per GET with its validators (ETag, Last-Modified, sha256), used
+# to revalidate instead of downloading and parsing unchanged payloads again.
+validators = TTLCache(max_size=VALIDATORS_MAX_SIZE, ttl=VALIDATORS_TTL)
+
+
+class AcuityClient:
+    def __init__(
+        self,
+        user_agent: str = "acuity-client/1.0",
+        timeout: float = DEFAULT_TIMEOUT,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        singleflight: Optional[SingleFlight] = None,
+        hedger: Optional[Hedger] = None,
+        read_priority: str = READ,
+    ):
+        """
+        Initializes an AcuityClient instance.
+
+        Args:
+            user_agent (str): The User-Agent sent to Acuity, one per Lambda.
+            timeout (float): Timeout in seconds for each upstream attempt.
+            retry_policy (RetryPolicy, optional): Retry policy for transient failures.
+                Defaults to a policy that retries idempotent reads only.
+            circuit_breaker (CircuitBreaker, optional): Breaker that fails fast while Acuity is down.
+                Defaults to the container-wide "acuity" breaker.
+            rate_limiter (RateLimiter, optional): Account-wide quota shared by all Lambdas.
+                Defaults to the container-wide "acuity" limiter.
+            singleflight (SingleFlight, optional): Coalesces identical concurrent GETs.
+                Defaults to the container-wide instance.
+            hedger (Hedger, optional): Hedges slow GETs that opt in with hedge=True.
+                Defaults to the container-wide "acuity" hedger.
+            read_priority (str): Rate limiter priority of GETs; scheduled jobs use BACKGROUND.
+
+        Returns:
+            None
+        """
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or get_breaker("acuity")
+        self.rate_limiter = rate_limiter or get_rate_limiter("acuity")
+        self.singleflight = singleflight or get_singleflight()
+        self.hedger = hedger or get_hedger("acuity")
+        self.read_priority = read_priority
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict] = None,
+        json: Optional[Any] = None,
+        idempotent: Optional[bool] = None,
+        headers: Optional[dict] = None,
+        hedge: bool = False,
+    ) -> requests.Response:
+        """
+        Sends a request to the Acuity API through the shared session.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path relative to BASE_URL (e.g. "/calendars").
+            params (dict, optional): Query string parameters. Defaults to None.
+            json (Any, optional): JSON body for mutations. Defaults to None.
+            idempotent (bool, optional): Allows retrying a mutation as if it were idempotent.
+            headers (dict, optional): Extra request headers. Defaults to None.
+            hedge (bool): Sends a second copy of a slow GET and keeps the first answer.
+
+        Returns:
+            requests.Response: The raw upstream response.
+
+        Raises:
+            CircuitOpenError: If Acuity is failing and the call was not attempted.
+            RateLimitExceeded: If the shared Acuity quota stayed exhausted.
+        """
+        def send(timeout: float) -> requests.Response:
+            # Every attempt, retries included, spends quota; mutations win over browsing reads
+            self.rate_limiter.acquire(self.read_priority if method.upper() == "GET" else MUTATION)
+            if hedge and method.upper() == "GET":
+                return self.hedger.call(
+                    path,
+                    lambda: self._send(method, path, params, json, headers, timeout),
+                    can_hedge=lambda: self.rate_limiter.try_acquire(self.read_priority),
+                )
+            return self._send(method, path, params, json, headers, timeout)
+
+        return self.circuit_breaker.call(
+            lambda: self.retry_policy.call(
+                send,
+                method=method,
+                idempotent=idempotent,
+                timeout=self.timeout,
+            )
+        )
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict],
+        json: Optional[Any],
+        headers: Optional[dict],
+        timeout: float,
+    ) -> requests.Response:
+        return session.request(
+            method,
+            f"{BASE_URL}{path}",
+            params=params,
+            json=json,
+            headers={**(headers or {}), "User-Agent": self.user_agent},
+            timeout=timeout,
+        )
+
+    def request_json(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict] = None,
+        json: Optional[Any] = None,
+        idempotent: Optional[bool] = None,
+        hedge: bool = False,
+        flight_scope: Optional[str] = None,
+    ) -> Any:
+        """
+        Sends a request and returns the decoded JSON body.
+
+        Concurrent identical GETs share one upstream request and its parsed
+        body, which callers must not mutate. GETs with a different flight_scope
+        are never shared, e.g. reads made before and after an invalidation.
+        Latency-critical GETs may pass hedge=True (see hedging.py).
+
+        Raises:
+            requests.HTTPError: If Acuity answers with a non-2xx status.
+        """
+        if method.upper() == "GET":
+            key = make_key(method, path, params)
+            return self.singleflight.do(
+                f"{key}#{flight_scope}" if flight_scope else key,
+                lambda: self._revalidate_json(path, params, hedge),
+            )
+        response = self.request(method, path, params=params, json=json, idempotent=idempotent)
+        response.raise_for_status()
+        return response.json()
+
+    def _revalidate_json(self, path: str, params: Optional[dict], hedge: bool = False) -> Any:
+        """
+        GETs a resource revalidating the last known body.
+
+        Conditional headers are sent when Acuity gave validators; a 304
+        returns the stored body. Otherwise, when the downloaded bytes hash
+        the same as before, the stored parsed body is returned without
+        parsing again (callers can detect it by identity).
+        """
+        key = make_key("GET", path, params)
+        known = validators.get(key)
+        headers = {}
+        if known and known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known and known.get("lastModified"):
+            headers["If-Modified-Since"] = known["lastModified"]
+
+        response = self.request("GET", path, params=params, headers=headers, hedge=hedge)
+        if response.status_code == 304 and known:
+            validators.set(key, known)
+            return known["data"]
+        response.raise_for_status()
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        if known and known.get("digest") == digest:
+            data = known["data"]
+        else:
+            data = response.json()
+        validators.set(key, {
+            "etag": response.headers.get("ETag"),
+            "lastModified": response.headers.get("Last-Modified"),
+            "digest": digest,
+            "data": data,
+        })
+        return data
+
+    def get_calendars(self) -> List[Dict[str, Any]]:
+        return self.request_json("GET", "/calendars")
+
+    def get_appointment_types(self) -> List[Dict[str, Any]]:
+        return self.request_json("GET", "/appointment-types")
+
+    def get_availability_times(
+        self,
+        date: str,
+        appointment_type_id: Optional[Union[int, str]] = None,
+        calendar_id: Optional[Union[int, str]] = None,
+        timezone: Optional[str] = None,
+        hedge: bool = False,
+        flight_scope: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        params = {"date": date}
+        if calendar_id is not None:
+            params["calendarID"] = calendar_id
+        if appointment_type_id is not None:
+            params["appointmentTypeID"] = appointment_type_id
+        if timezone is not None:
+            params["timezone"] = timezone
+        return self.request_json("GET", "/availability/times", params=params, hedge=hedge, flight_scope=flight_scope)
+
+    def get_availability_dates(
+        self,
+        month: str,
+        appointment_type_id: Union[int, str],
+        calendar_id: Optional[Union[int, str]] = None,
+        timezone: Optional[str] = None,
+        flight_scope: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        params = {"month": month, "appointmentTypeID": appointment_type_id}
+        if calendar_id is not None:
+            params["calendarID"] = calendar_id
+        if timezone is not None:
+            params["timezone"] = timezone
+        return self.request_json("GET", "/availability/dates", params=params, flight_scope=flight_scope)
+
+    def get_appointments(self, params: Optional[dict] = None) -> List[Dict[str, Any]]:
+        return self.request_json("GET", "/appointments", params=params)
+
+    def get_appointment(self, appointment_id: Union[int, str]) -> Dict[str, Any]:
+        return self.request_json("GET", f"/appointments/{appointment_id}")
+
+    def create_appointment(self, payload: dict) -> Dict[str, Any]:
+        return self.request_json("POST", "/appointments", json=payload)
+
+    def update_appointment(self, appointment_id: Union[int, str], payload: dict) -> Dict[str, Any]:
+        return self.request_json("PUT", f"/appointments/{appointment_id}", json=payload)
+
+    def reschedule_appointment(self, appointment_id: Union[int, str], payload: dict) -> Dict[str, Any]:
+        return self.request_json("PUT", f"/appointments/{appointment_id}/reschedule", json=payload)
+
+    def cancel_appointment(self, appointment_id: Union[int, str], payload: Optional[dict] = None) -> Dict[str, Any]:
+        return self.request_json("PUT", f"/appointments/{appointment_id}/cancel", json=payload or {})
@@ -0,0 +1,492 @@
+import base64
+import logging
+import math
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+from zoneinfo import ZoneInfo
+
+from requests import HTTPError
+from requests.exceptions import ConnectionError, Timeout
+
+import availability_cache
+from acuity_async_client import run_concurrently
+from acuity_client import AcuityClient
+from availability_store import DayItem
+
+logger = logging.getLogger()
+
+MAX_RANGE_DAYS = 31
+MAX_COMBINATIONS = 10  # calendars x appointment types per request
+MAX_UPSTREAM_CALLS = 62  # days x combinations per request
+RANGE_CONCURRENCY = 6
+NEXT_AVAILABLE_HORIZON_DAYS = 90
+NEXT_AVAILABLE_BATCH = 3  # candidate days probed in parallel per round
+MATERIALIZE_CONCURRENCY = 4  # overlaps upstream latency; the pace is set by the BACKGROUND rate limit share
+MAX_COMPACT_COUNT = 255  # slot counts are packed as unsigned bytes
+
+
+def parse_date(yyyy_mm_dd: str) -> date:
+    return datetime.strptime(yyyy_mm_dd, "%Y-%m-%d").date()
+
+
+def date_range(start_date: str, end_date: str) -> List[str]:
+    """
+    Returns every day from start_date to end_date, both included.
+
+    Raises:
+        ValueError: If a date is invalid or end_date is before start_date.
+    """
+    start, end = parse_date(start_date), parse_date(end_date)
+    if end < start:
+        raise ValueError("end_date es anterior a start_date")
+    return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+
+def today(timezone: Optional[str] = None) -> str:
+    """
+    Returns today's date (YYYY-MM-DD) in the given timezone, or in UTC if missing or unknown.
+    """
+    try:
+        tz = ZoneInfo(timezone) if timezone else dt_timezone.utc
+    except (ValueError, KeyError):
+        tz = dt_timezone.utc
+    return datetime.now(tz).date().isoformat()
+
+
+def month_of(yyyy_mm_dd: str) -> str:
+    return yyyy_mm_dd[:7]
+
+
+def months_between(start_date: str, end_date: str) -> List[str]:
+    """
+    Returns the months (YYYY-MM) covered by start_date..end_date, in order.
+    """
+    start, end = parse_date(start_date), parse_date(end_date)
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def as_list(value: Optional[Union[str, int, List[Union[str, int]]]]) -> List[Optional[str]]:
+    """
+    Normalizes an optional id or list of ids; [None] means "no filter".
+    """
+    if value is None:
+        return [None]
+    values = value if isinstance(value, list) else [value]
+    unique = list(dict.fromkeys(str(v) for v in values if v is not None and str(v) != ""))
+    return unique or [None]
+
+
+def describe_error(error: Exception) -> Dict[str, Any]:
+    """
+    Summarizes an upstream error for an entry of a partial response.
+    """
+    if isinstance(error, HTTPError):
+        response = error.response
+        body = None
+        if response is not None:
+            try:
+                body = response.json()
+            except ValueError:
+                body = response.text
+        return {
+            "error": "Error al consultar el API de Acuity",
+            "upstream": {"status": response.status_code if response is not None else 502, "body": body},
+        }
+    if isinstance(error, (Timeout, ConnectionError)):
+        return {"error": "Error de comunicación con el API de Acuity"}
+    return {"error": "Error al consultar el API de Acuity"}
+
+
+def fetch_slots(
+    acuity: AcuityClient,
+    dates: List[str],
+    appointment_type_ids: List[Optional[str]],
+    calendar_ids: List[Optional[str]],
+    timezone: Optional[str] = None,
+    prune: bool = False,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]]:
+    """
+    Fetches /availability/times for every day x appointment type x calendar concurrently,
+    through the availability cache.
+
+    With a single appointment type and calendar each day keeps Acuity's
+    slot list as is; otherwise the day is merged into one timeline (see
+    merge_timeline).
+
+    Args:
+        acuity (AcuityClient): The shared client.
+        dates (List[str]): Days as YYYY-MM-DD.
+        appointment_type_ids (List[str]): Appointment types, [None] for no filter.
+        calendar_ids (List[str]): Calendars, [None] for no filter.
+        timezone (str, optional): Timezone passed to Acuity.
+        prune (bool): Ask /availability/dates first for the covered months and skip the
+            days without openings (needs appointment types, as Acuity does).
+
+    Returns:
+        Tuple[dict, list]: Slots per day (days where every call failed are left out),
+        and one error entry per failed call.
+    """
+    pairs = [(type_id, calendar_id) for type_id in appointment_type_ids for calendar_id in calendar_ids]
+    summaries = month_summaries(acuity, dates, pairs, timezone) if prune and None not in appointment_type_ids else {}
+    merge = len(pairs) > 1
+    fetched: Dict[str, List[Tuple[Optional[str], Optional[str], List[Dict[str, Any]]]]] = {}
+    combinations = []
+    for day in dates:
+        for type_id, calendar_id in pairs:
+            open_set = summaries.get((type_id, calendar_id, month_of(day)))
+            if open_set is not None and day not in open_set:
+                fetched.setdefault(day, []).append((type_id, calendar_id, []))
+            else:
+                combinations.append((day, type_id, calendar_id))
+
+    results = run_concurrently(
+        [
+            lambda day=day, type_id=type_id, calendar_id=calendar_id: availability_cache.get_times(
+                acuity, day, type_id, calendar_id, timezone, hedge=True
+            )
+            for day, type_id, calendar_id in combinations
+        ],
+        max_concurrency=RANGE_CONCURRENCY,
+    )
+    errors: List[Dict[str, Any]] = []
+    for (day, type_id, calendar_id), result in zip(combinations, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error consultando disponibilidad de {day} ({type_id}, {calendar_id}): {result}")
+            entry = {"date": day}
+            if merge:
+                entry.update({"appointmentTypeID": type_id, "calendarID": calendar_id})
+            errors.append({**entry, **describe_error(result)})
+        else:
+            fetched.setdefault(day, []).append((type_id, calendar_id, result or []))
+
+    days = {}
+    for day in dates:
+        if day in fetched:
+            days[day] = merge_timeline(fetched[day]) if merge else fetched[day][0][2]
+    return days, errors
+
+
+def month_summaries(
+    acuity: AcuityClient,
+    dates: List[str],
+    pairs: List[Tuple[str, Optional[str]]],
+    timezone: Optional[str] = None,
+) -> Dict[Tuple[str, Optional[str], str], set]:
+    """
+    Fetches the cached /availability/dates summaries of the months covered by dates.
+
+    Returns:
+        dict: The open days per (appointmentTypeID, calendarID, YYYY-MM). Failed
+        summaries are left out, so their days are fetched without pruning.
+    """
+    months = list(dict.fromkeys(month_of(day) for day in dates))
+    keys = [(type_id, calendar_id, month) for type_id, calendar_id in pairs for month in months]
+    results = run_concurrently(
+        [
+            lambda type_id=type_id, calendar_id=calendar_id, month=month: availability_cache.get_dates(
+                acuity, month, type_id, calendar_id, timezone
+            )
+            for type_id, calendar_id, month in keys
+        ],
+        max_concurrency=RANGE_CONCURRENCY,
+    )
+    summaries = {}
+    for key, result in zip(keys, results):
+        if isinstance(result, Exception):
+            logger.warning(f"No se pudieron podar los días de {key[2]} ({key[0]}, {key[1]}): {result}")
+        else:
+            summaries[key] = {entry.get("date") for entry in result or [] if entry.get("date")}
+    return summaries
+
+
+def slot_count(slot: Dict[str, Any]) -> int:
+    """
+    Returns the slotsAvailable of an Acuity slot; a listed slot without it counts as 1, since it is open.
+    """
+    available = slot.get("slotsAvailable")
+    return 1 if available is None else int(available)
+
+
+def merge_timeline(results: List[Tuple[Optional[str], Optional[str], List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """
+    Merges the slots of several calendars and appointment types of one day.
+
+    Slots at the same time become one entry annotated with the calendars
+    and appointment types that offer it, with their slotsAvailable summed.
+
+    Returns:
+        List[dict]: Entries {"time", "slotsAvailable", "calendarIDs", "appointmentTypeIDs"} sorted by time.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for type_id, calendar_id, slots in results:
+        for slot in slots:
+            time = slot.get("time")
+            if not time:
+                continue
+            entry = merged.setdefault(time, {"time": time, "slotsAvailable": 0, "calendarIDs": [], "appointmentTypeIDs": []})
+            entry["slotsAvailable"] += slot_count(slot)
+            slot_calendar = slot.get("calendarID", calendar_id)
+            if slot_calendar is not None and slot_calendar not in entry["calendarIDs"]:
+                entry["calendarIDs"].append(slot_calendar)
+            if type_id is not None and type_id not in entry["appointmentTypeIDs"]:
+                entry["appointmentTypeIDs"].append(type_id)
+    return sorted(merged.values(), key=lambda entry: slot_sort_key(entry["time"]))
+
+
+def slot_sort_key(time: str):
+    # Acuity times carry their UTC offset (e.g. 2025-09-20T09:00:00-0600)
+    try:
+        return datetime.strptime(time, "%Y-%m-%dT%H:%M:%S%z").timestamp()
+    except (TypeError, ValueError):
+        return float("inf")
+
+
+def first_available(days: Dict[str, List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the earliest slot across all days, or None if there is none.
+    """
+    slots = [slot for day_slots in days.values() for slot in day_slots if slot.get("time")]
+    if not slots:
+        return None
+    return min(slots, key=lambda slot: slot_sort_key(slot["time"]))
+
+
+def open_days(
+    acuity: AcuityClient,
+    month: str,
+    appointment_type_ids: List[Optional[str]],
+    calendar_ids: List[Optional[str]],
+    timezone: Optional[str] = None,
+) -> Tuple[Optional[List[str]], List[Dict[str, Any]]]:
+    """
+    Lists the days of a month with openings, from Acuity's /availability/dates summary.
+
+    Args:
+        acuity (AcuityClient): The shared client.
+        month (str): The month as YYYY-MM.
+        appointment_type_ids (List[str]): Appointment types; /availability/dates requires one.
+        calendar_ids (List[str]): Calendars, [None] for no filter.
+        timezone (str, optional): Timezone passed to Acuity.
+
+    Returns:
+        Tuple[list or None, list]: The sorted open days of every combination together, or None
+        if every call failed, and one error entry per failed call.
+    """
+    combinations = [(type_id, calendar_id) for type_id in appointment_type_ids for calendar_id in calendar_ids]
+    results = run_concurrently(
+        [
+            lambda type_id=type_id, calendar_id=calendar_id: availability_cache.get_dates(
+                acuity, month, type_id, calendar_id, timezone
+            )
+            for type_id, calendar_id in combinations
+        ],
+        max_concurrency=RANGE_CONCURRENCY,
+    )
+    days = set()
+    errors: List[Dict[str, Any]] = []
+    for (type_id, calendar_id), result in zip(combinations, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error consultando días disponibles de {month} ({type_id}, {calendar_id}): {result}")
+            errors.append({"month": month, "appointmentTypeID": type_id, "calendarID": calendar_id, **describe_error(result)})
+        else:
+            days.update(entry.get("date") for entry in result or [] if entry.get("date"))
+    if len(errors) == len(combinations):
+        return None, errors
+    return sorted(days), errors
+
+
+def find_next_available(
+    acuity: AcuityClient,
+    start_date: str,
+    end_date: str,
+    appointment_type_ids: List[Optional[str]],
+    calendar_ids: List[Optional[str]],
+    timezone: Optional[str] = None,
+    batch_size: int = NEXT_AVAILABLE_BATCH,
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Finds the earliest open slot between start_date and end_date.
+
+    Month by month, /availability/dates narrows the search to days with
+    openings; those days are then probed in order, batch_size at a time in
+    parallel, and the search stops at the first batch with a slot. The slot is
+    only the earliest one if every day before it was confirmed empty: a failed
+    month summary, or a failed probe on or before its day, leaves the answer
+    unconfirmed (as does any error when nothing was found).
+
+    Returns:
+        Tuple[dict or None, dict, list]: The slot (None if there is none), search
+        stats {"date", "monthsScanned", "daysProbed", "confirmed"} and the errors found
+        along the way.
+
+    Raises:
+        ValueError: If a date is invalid or end_date is before start_date.
+    """
+    if parse_date(end_date) < parse_date(start_date):
+        raise ValueError("end_date es anterior a start_date")
+    errors: List[Dict[str, Any]] = []
+    stats = {"date": None, "monthsScanned": 0, "daysProbed": 0, "confirmed": True}
+    for month in months_between(start_date, end_date):
+        candidates, month_errors = open_days(acuity, month, appointment_type_ids, calendar_ids, timezone)
+        stats["monthsScanned"] += 1
+        errors.extend(month_errors)
+        if candidates is None:
+            # Without the summary the month cannot be pruned, and probing every day defeats the purpose
+            break
+        candidates = [day for day in candidates if start_date <= day <= end_date]
+        for offset in range(0, len(candidates), batch_size):
+            batch = candidates[offset:offset + batch_size]
+            days, batch_errors = fetch_slots(acuity, batch, appointment_type_ids, calendar_ids, timezone)
+            stats["daysProbed"] += len(batch)
+            errors.extend(batch_errors)
+            for day in batch:
+                if days.get(day):
+                    stats["date"] = day
+                    # Month errors have no date; a failed day after the slot cannot hide an earlier one
+                    stats["confirmed"] = all(error.get("date") and error["date"] > day for error in errors)
+                    return first_available({day: days[day]}), stats, errors
+    stats["confirmed"] = not errors
+    return None, stats, errors
+
+
+def bookable_combinations(calendars: List[Dict[str, Any]], appointment_types: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """
+    Returns every (calendarID, appointmentTypeID) pair that can be booked.
+
+    Inactive appointment types are skipped; a type without calendarIDs is
+    offered by every calendar.
+    """
+    calendar_ids = [str(calendar.get("id")) for calendar in calendars or [] if calendar.get("id") is not None]
+    combinations = []
+    for appointment_type in appointment_types or []:
+        if appointment_type.get("id") is None or appointment_type.get("active") is False:
+            continue
+        offered_by = [str(c) for c in appointment_type.get("calendarIDs") or []] or calendar_ids
+        combinations.extend(
+            (calendar_id, str(appointment_type["id"])) for calendar_id in offered_by if calendar_id in calendar_ids
+        )
+    return combinations
+
+
+def collect_days(
+    acuity: AcuityClient,
+    combinations: List[Tuple[str, str]],
+    dates: List[str],
+    timezone: Optional[str] = None,
+    max_concurrency: int = MATERIALIZE_CONCURRENCY,
+) -> Tuple[List[DayItem], Dict[str, int]]:
+    """
+    Fetches the availability of every combination and day, for the materialized view.
+
+    Each month is summarized with /availability/dates first, so closed days
+    are stored as empty without asking for their times. Each item carries
+    the time its upstream read started (see AvailabilityStore.put_days).
+
+    Args:
+        acuity (AcuityClient): The shared client.
+        combinations (List[Tuple[str, str]]): (calendarID, appointmentTypeID) pairs.
+        dates (List[str]): Consecutive days as YYYY-MM-DD.
+        timezone (str, optional): Timezone passed to Acuity.
+        max_concurrency (int): Maximum number of in-flight upstream calls.
+
+    Returns:
+        Tuple[list, dict]: The items to store, and stats {"combinations", "probed", "errors"}.
+        Failed reads (including those cut by the deadline) are left out.
+    """
+    def timed(call):
+        started = int(time.time() * 1000)
+        return started, call()
+
+    months = months_between(dates[0], dates[-1]) if dates else []
+    summaries = [(calendar_id, type_id, month) for calendar_id, type_id in combinations for month in months]
+    results = run_concurrently(
+        [
+            lambda calendar_id=calendar_id, type_id=type_id, month=month: timed(
+                lambda: acuity.get_availability_dates(month, type_id, calendar_id, timezone)
+            )
+            for calendar_id, type_id, month in summaries
+        ],
+        max_concurrency=max_concurrency,
+    )
+    items: List[DayItem] = []
+    probes = []
+    errors = 0
+    for (calendar_id, type_id, month), result in zip(summaries, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error consultando días disponibles de {month} ({type_id}, {calendar_id}): {result}")
+            errors += 1
+            continue
+        started, open_dates = result
+        open_set = {entry.get("date") for entry in open_dates or []}
+        for day in dates:
+            if month_of(day) != month:
+                continue
+            if day in open_set:
+                probes.append((calendar_id, type_id, day))
+            else:
+                items.append((calendar_id, type_id, timezone, day, [], started))
+
+    results = run_concurrently(
+        [
+            lambda calendar_id=calendar_id, type_id=type_id, day=day: timed(
+                lambda: acuity.get_availability_times(day, type_id, calendar_id, timezone)
+            )
+            for calendar_id, type_id, day in probes
+        ],
+        max_concurrency=max_concurrency,
+    )
+    for (calendar_id, type_id, day), result in zip(probes, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error consultando disponibilidad de {day} ({type_id}, {calendar_id}): {result}")
+            errors += 1
+            continue
+        started, slots = result
+        items.append((calendar_id, type_id, timezone, day, slots or [], started))
+    return items, {"combinations": len(combinations), "probed": len(probes), "errors": errors}
+
+
+def encode_compact(slots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Packs the slots of one day into a grid of slot counts.
+
+    The grid starts at the first slot and advances granularity minutes per
+    cell (the GCD of the gaps between slots); each cell holds slotsAvailable
+    as an unsigned byte, capped at MAX_COMPACT_COUNT (1 when Acuity omits it),
+    and 0 where Acuity has no slot. Cells are stepped in absolute time, so days crossing a DST change
+    stay consistent.
+
+    Args:
+        slots (List[dict]): Slots of one day with "time" and "slotsAvailable".
+
+    Returns:
+        dict: {"start": ISO time of the first cell or None, "granularity": minutes or None,
+        "slots": base64 of the counts}.
+    """
+    stamps = {}
+    for slot in slots or []:
+        key = slot_sort_key(slot.get("time"))
+        if key != float("inf"):
+            stamps[int(key // 60)] = (slot["time"], min(MAX_COMPACT_COUNT, max(0, slot_count(slot))))
+    if not stamps:
+        return {"start": None, "granularity": None, "slots": ""}
+
+    minutes = sorted(stamps)
+    granularity = 0
+    for previous, current in zip(minutes, minutes[1:]):
+        granularity = math.gcd(granularity, current - previous)
+    granularity = granularity or 1
+    counts = array("B", bytes((minutes[-1] - minutes[0]) // granularity + 1))
+    for minute in minutes:
+        counts[(minute - minutes[0]) // granularity] = stamps[minute][1]
+    return {
+        "start": stamps[minutes[0]][0],
+        "granularity": granularity,
+        "slots": base64.b64encode(counts.tobytes()).decode("ascii"),
+    }
@@ -0,0 +1,194 @@
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from acuity_client import AcuityClient
+from availability_store import AvailabilityStore
+from db_repository import DBRepository
+from two_tier_cache import TwoTierCache
+
+logger = logging.getLogger()
+
+AVAILABILITY_CACHE_TTL = float(os.environ.get("AVAILABILITY_CACHE_TTL_SECONDS") or 60)
+ANY_CALENDAR = "any"
+
+# Slots of a calendar-day only change when someone books, reschedules or cancels.
+# Every entry key carries the generation of its calendar-day tag; bumping the tag
+# after a write makes every entry of that day (any type, any timezone) unreachable
+# at once, and the orphaned entries simply expire.
+times_cache = TwoTierCache("availability", ttl=AVAILABILITY_CACHE_TTL, l1_max_size=512)
+# /availability/dates month summaries, tagged per calendar-month the same way
+dates_cache = TwoTierCache("availability-dates", ttl=AVAILABILITY_CACHE_TTL, l1_max_size=128)
+
+_table_name = os.environ.get("CACHE_TABLE")
+tags = DBRepository(_table_name) if _table_name else None
+
+view = AvailabilityStore()
+
+
+def _tag_key(calendar_id: Optional[Union[int, str]], period: str) -> str:
+    return f"availability-tag#{calendar_id if calendar_id is not None else ANY_CALENDAR}#{period}"
+
+
+def _generation(calendar_id: Optional[Union[int, str]], period: str) -> Optional[int]:
+    """
+    Returns the current generation of a calendar-day (YYYY-MM-DD) or calendar-month
+    (YYYY-MM) tag, or None if it cannot be read.
+    """
+    if tags is None:
+        return 0
+    try:
+        item = tags.table.get_item(Key={"cacheKey": _tag_key(calendar_id, period)}, ConsistentRead=True).get("Item")
+    except Exception as error:
+        logger.warning(f"No se pudo leer la generación de disponibilidad de {period}: {error}")
+        return None
+    return int(item.get("generation") or 0) if item else 0
+
+
+def _flight_scope(generation: Optional[int]) -> str:
+    """
+    Singleflight scope of a cache load. Without a known generation the read is
+    never shared, since it could join one started before the last write.
+    """
+    return f"generation={generation}" if generation is not None else f"uncached={time.time_ns()}"
+
+
+def get_times(
+    acuity: AcuityClient,
+    date: str,
+    appointment_type_id: Optional[Union[int, str]] = None,
+    calendar_id: Optional[Union[int, str]] = None,
+    timezone: Optional[str] = None,
+    hedge: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Returns /availability/times of one day from the availability cache.
+
+    Days of a single calendar and appointment type are read from the
+    materialized view first (see AvailabilityStore), unless invalidated
+    since they were materialized. Queries without calendar are tagged with
+    the "any" calendar, which every write bumps too. When the tag cannot be
+    read the cache is bypassed, since a stale answer could not be ruled out.
+
+    Args:
+        acuity (AcuityClient): Client used on a cache miss.
+        date (str): The day as YYYY-MM-DD.
+        appointment_type_id (int | str, optional): The appointment type.
+        calendar_id (int | str, optional): The calendar.
+        timezone (str, optional): Timezone passed to Acuity.
+        hedge (bool): Whether a slow upstream read gets a hedged copy.
+
+    Returns:
+        List[Dict[str, Any]]: The slots as returned by Acuity.
+    """
+    generation = _generation(calendar_id, date)
+
+    def load():
+        # Scoped to the generation: a load after a write never shares a read started before it
+        return acuity.get_availability_times(
+            date, appointment_type_id, calendar_id, timezone, hedge=hedge, flight_scope=_flight_scope(generation)
+        )
+
+    if generation is None:
+        return load()
+    if calendar_id is not None and appointment_type_id is not None:
+        slots = view.get_day(calendar_id, appointment_type_id, timezone, date, not_before=generation)
+        if slots is not None:
+            return slots
+    key = "#".join([
+        date,
+        str(calendar_id if calendar_id is not None else ANY_CALENDAR),
+        str(appointment_type_id if appointment_type_id is not None else ""),
+        timezone or "",
+        str(generation),
+    ])
+    return times_cache.get_or_load(key, load)
+
+
+def get_dates(
+    acuity: AcuityClient,
+    month: str,
+    appointment_type_id: Union[int, str],
+    calendar_id: Optional[Union[int, str]] = None,
+    timezone: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Returns /availability/dates of one month from the availability cache.
+
+    Like get_times, keyed by the generation of the calendar-month tag, which
+    every write in that month bumps: a cancellation can reopen a day the
+    cached summary had as closed.
+
+    Returns:
+        List[Dict[str, Any]]: The open days as returned by Acuity ({"date": "YYYY-MM-DD"}).
+    """
+    generation = _generation(calendar_id, month)
+
+    def load():
+        return acuity.get_availability_dates(
+            month, appointment_type_id, calendar_id, timezone, flight_scope=_flight_scope(generation)
+        )
+
+    if generation is None:
+        return load()
+    key = "#".join([
+        month,
+        str(calendar_id if calendar_id is not None else ANY_CALENDAR),
+        str(appointment_type_id),
+        timezone or "",
+        str(generation),
+    ])
+    return dates_cache.get_or_load(key, load)
+
+
+def invalidate(calendar_id: Optional[Union[int, str]], dates: Iterable[str]):
+    """
+    Bumps the tags of the given calendar-days and their months, and of the same
+    days and months for "any" calendar.
+
+    Call after a successful Acuity write. Errors are only logged; the entries
+    still expire after AVAILABILITY_CACHE_TTL.
+    """
+    if tags is None:
+        return
+    now = time.time()
+    # Outlive every cache entry and materialized day the bump has to hide
+    lifetime = 2 * max(AVAILABILITY_CACHE_TTL, view.max_age)
+    periods = {period for date in dates if date for period in (date, date[:7])}
+    keys = {_tag_key(ANY_CALENDAR, period) for period in periods}
+    if calendar_id is not None:
+        keys.update(_tag_key(calendar_id, period) for period in periods)
+    for key in keys:
+        try:
+            # A timestamp instead of a counter: a tag that expired and is bumped again
+            # never reuses a generation whose entries may still be cached.
+            tags.table.put_item(Item={
+                "cacheKey": key,
+                "generation": int(now * 1000),
+                "expiresAt": int(now + lifetime),
+            })
+        except Exception as error:
+            logger.warning(f"No se pudo invalidar la disponibilidad {key}: {error}")
+
+
+def appointment_day(appointment: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Returns the local day (YYYY-MM-DD) of an Acuity appointment, from its "datetime" field.
+    """
+    value = str((appointment or {}).get("datetime") or "")
+    return value[:10] if len(value) >= 10 else None
+
+
+def invalidate_appointments(*appointments: Optional[Dict[str, Any]]):
+    """
+    Invalidates the calendar-days of Acuity appointments, e.g. before and after a reschedule.
+    """
+    by_calendar: Dict[Optional[str], set] = {}
+    for appointment in appointments:
+        day = appointment_day(appointment)
+        if day:
+            calendar_id = appointment.get("calendarID")
+            by_calendar.setdefault(str(calendar_id) if calendar_id is not None else None, set()).add(day)
+    for calendar_id, days in by_calendar.items():
+        invalidate(calendar_id, days)
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from db_repository import DBRepository
+from decimalencoder import DecimalEncoder
+
+logger = logging.getLogger()
+
+AVAILABILITY_VIEW_MAX_AGE = float(os.environ.get("AVAILABILITY_VIEW_MAX_AGE_SECONDS") or 1800)
+
+# (calendarID, appointmentTypeID, timezone, date, slots, materializedAt in epoch ms)
+DayItem = Tuple[Union[int, str], Union[int, str], Optional[str], str, List[Dict[str, Any]], int]
+
+
+def view_key(calendar_id: Union[int, str], appointment_type_id: Union[int, str], timezone: Optional[str]) -> str:
+    return f"{calendar_id}#{appointment_type_id}#{timezone or ''}"
+
+
+class AvailabilityStore:
+    def __init__(self, table_name: Optional[str] = None, max_age: float = AVAILABILITY_VIEW_MAX_AGE):
+        """
+        Initializes an AvailabilityStore instance.
+
+        The materialized availability view: one item per calendar, appointment
+        type, timezone and day with the /availability/times slots, written by
+        the materialize-availability job. Slots are zlib-compressed JSON like
+        the cache table values.
+
+        Args:
+            table_name (str, optional): The availability table. Defaults to AVAILABILITY_TABLE;
+                without it the store is disabled.
+            max_age (float): Seconds after which a materialized day is considered stale.
+
+        Returns:
+            None
+        """
+        table_name = table_name or os.environ.get("AVAILABILITY_TABLE")
+        self.repository = DBRepository(table_name) if table_name else None
+        self.max_age = max_age
+
+    def get_day(
+        self,
+        calendar_id: Union[int, str],
+        appointment_type_id: Union[int, str],
+        timezone: Optional[str],
+        date: str,
+        not_before: int = 0,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns the materialized slots of a day, or None on a miss.
+
+        Args:
+            calendar_id (int | str): The calendar.
+            appointment_type_id (int | str): The appointment type.
+            timezone (str, optional): The timezone the slots were fetched with.
+            date (str): The day as YYYY-MM-DD.
+            not_before (int): Epoch ms of the last invalidation of the calendar-day; days
+                materialized before it are treated as a miss.
+
+        Returns:
+            list or None: The slots as returned by Acuity. Missing, stale and unreadable
+            items are a miss; errors are logged.
+        """
+        if self.repository is None:
+            return None
+        try:
+            item = self.repository.table.get_item(
+                Key={"availabilityKey": view_key(calendar_id, appointment_type_id, timezone), "date": date}
+            ).get("Item")
+        except Exception as error:
+            logger.warning(f"No se pudo leer la disponibilidad materializada de {date}: {error}")
+            return None
+        if not item:
+            return None
+        materialized_at = int(item.get("materializedAt") or 0)
+        if materialized_at < not_before or materialized_at < (time.time() - self.max_age) * 1000:
+            return None
+        try:
+            return json.loads(zlib.decompress(item["slots"].value))
+        except Exception as error:
+            logger.warning(f"Entrada inválida en la disponibilidad materializada de {date}: {error}")
+            return None
+
+    def put_days(self, days: Iterable[DayItem]) -> int:
+        """
+        Writes materialized days in batches.
+
+        materializedAt must be taken before the upstream read, so a booking made
+        while the read was in flight still invalidates the day.
+
+        Returns:
+            int: The number of items written.
+        """
+        if self.repository is None:
+            return 0
+        written = 0
+        with self.repository.table.batch_writer(overwrite_by_pkeys=["availabilityKey", "date"]) as batch:
+            for item in days:
+                batch.put_item(Item=self._item(*item))
+                written += 1
+        return written
+
+    def put_day(self, *item) -> bool:
+        """
+        Writes a single materialized day (see DayItem). Errors are only logged.
+        """
+        if self.repository is None:
+            return False
+        try:
+            self.repository.table.put_item(Item=self._item(*item))
+            return True
+        except Exception as error:
+            logger.warning(f"No se pudo escribir la disponibilidad materializada: {error}")
+            return False
+
+    def _item(
+        self,
+        calendar_id: Union[int, str],
+        appointment_type_id: Union[int, str],
+        timezone: Optional[str],
+        date: str,
+        slots: List[Dict[str, Any]],
+        materialized_at: int,
+    ) -> Dict[str, Any]:
+        return {
+            "availabilityKey": view_key(calendar_id, appointment_type_id, timezone),
+            "date": date,
+            "slots": zlib.compress(json.dumps(slots or [], cls=DecimalEncoder).encode("utf-8")),
+            "materializedAt": materialized_at,
+            "expiresAt": int(materialized_at / 1000 + 2 * self.max_age),
+        }
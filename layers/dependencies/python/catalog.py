@@ -0,0 +1,44 @@
+import logging
+import os
+from typing import Any, Dict, List
+
+from acuity_client import AcuityClient
+from two_tier_cache import TwoTierCache
+
+logger = logging.getLogger()
+
+CATALOG_CACHE_TTL = float(os.environ.get("CATALOG_CACHE_TTL_SECONDS") or 3600)
+
+# Calendars and appointment types change a few times a month. The request that
+# finds an expired L1 entry refreshes it within its own invocation; for one more
+# TTL concurrent requests (and a failed refresh) get the previous value. Cold
+# containers read the copy stored in the shared cache table.
+catalog_cache = TwoTierCache(
+    "catalog", ttl=CATALOG_CACHE_TTL, l1_stale_ttl=CATALOG_CACHE_TTL, l1_max_size=16
+)
+
+
+def get_calendars(acuity: AcuityClient) -> List[Dict[str, Any]]:
+    """
+    Returns the Acuity calendars from the catalog cache.
+
+    Args:
+        acuity (AcuityClient): Client used on a cache miss.
+
+    Returns:
+        List[Dict[str, Any]]: The calendars as returned by Acuity.
+    """
+    return catalog_cache.get_or_load("calendars", acuity.get_calendars)
+
+
+def get_appointment_types(acuity: AcuityClient) -> List[Dict[str, Any]]:
+    """
+    Returns the Acuity appointment types from the catalog cache.
+
+    Args:
+        acuity (AcuityClient): Client used on a cache miss.
+
+    Returns:
+        List[Dict[str, Any]]: The appointment types as returned by Acuity.
+    """
+    return catalog_cache.get_or_load("appointment-types", acuity.get_appointment_types)
@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.exceptions import ConnectionError, RequestException, Timeout
+
+from db_repository import DBRepository
+from deadline import DeadlineExceeded
+from exception_handling import catch
+
+logger = logging.getLogger()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(RequestException):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class SharedCircuitState:
+    def __init__(self, table_name: str):
+        """
+        Initializes a SharedCircuitState instance.
+
+        Open circuits are stored in the coordination table so that every
+        container stops calling a failing upstream, not only the one that
+        detected the failure.
+
+        Args:
+            table_name (str): The name of the coordination DynamoDB table.
+
+        Returns:
+            None
+        """
+        self.repository = DBRepository(table_name)
+
+    @catch
+    def get_open_until(self, name: str) -> float:
+        """
+        Returns the epoch (seconds) until which the circuit is open for all containers.
+        """
+        item = self.repository.get({"pk": f"circuit#{name}", "sk": "state"})
+        if not item:
+            return 0.0
+        return float(item.get("openUntil") or 0)
+
+    @catch
+    def set_open_until(self, name: str, open_until: float):
+        """
+        Publishes that the circuit is open until the given epoch (seconds).
+        """
+        self.repository.save({
+            "pk": f"circuit#{name}",
+            "sk": "state",
+            "openUntil": int(open_until),
+            "expiresAt": int(max(open_until, time.time())) + 60,
+        })
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        shared_state: Optional[SharedCircuitState] = None,
+        sync_interval: float = 5.0,
+    ):
+        """
+        Initializes a CircuitBreaker instance.
+
+        Args:
+            name (str): The upstream name (e.g. "acuity", "shopify").
+            failure_threshold (int): Consecutive failures that open the circuit.
+            recovery_timeout (float): Seconds the circuit stays open before a half-open probe.
+            shared_state (SharedCircuitState, optional): Cross-container state. Defaults to None.
+            sync_interval (float): Minimum seconds between reads of the shared state.
+
+        Returns:
+            None
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.shared_state = shared_state
+        self.sync_interval = sync_interval
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self.probe_in_flight = False
+        self.last_sync = 0.0
+        self.lock = threading.Lock()
+
+    def call(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Sends a request through the breaker.
+
+        Network errors and 5xx responses count as failures; any other
+        response closes the circuit again.
+
+        Args:
+            send (Callable[[], requests.Response]): Sends the request.
+
+        Returns:
+            requests.Response: The upstream response.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and the call was not attempted.
+        """
+        self.before_call()
+        try:
+            response = send()
+        except DeadlineExceeded:
+            # Our own invocation ran out of time; says nothing about the upstream
+            self.release_probe()
+            raise
+        except (Timeout, ConnectionError):
+            self.record_failure()
+            raise
+        except Exception:
+            self.release_probe()
+            raise
+        if response.status_code >= 500:
+            self.record_failure()
+        else:
+            self.record_success()
+        return response
+
+    def before_call(self):
+        self._sync_shared_state()
+        with self.lock:
+            now = time.time()
+            if self.state == OPEN:
+                if now < self.open_until:
+                    raise CircuitOpenError(f"Circuito abierto para {self.name}")
+                self.state = HALF_OPEN
+                logger.info(f"Circuito {self.name} en half-open")
+            if self.state == HALF_OPEN:
+                if self.probe_in_flight:
+                    raise CircuitOpenError(f"Circuito en prueba para {self.name}")
+                self.probe_in_flight = True
+
+    def record_success(self):
+        recovered = False
+        with self.lock:
+            if self.state != CLOSED:
+                recovered = True
+                logger.info(f"Circuito {self.name} cerrado")
+            self.state = CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+        if recovered and self.shared_state:
+            self.shared_state.set_open_until(self.name, 0)
+
+    def record_failure(self):
+        publish = False
+        with self.lock:
+            self.failures += 1
+            self.probe_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.open_until = time.time() + self.recovery_timeout
+                publish = True
+                logger.warning(f"Circuito {self.name} abierto por {self.recovery_timeout}s")
+        if publish and self.shared_state:
+            self.shared_state.set_open_until(self.name, self.open_until)
+
+    def release_probe(self):
+        with self.lock:
+            self.probe_in_flight = False
+
+    def _sync_shared_state(self):
+        if not self.shared_state or self.state != CLOSED:
+            return
+        now = time.time()
+        if now - self.last_sync < self.sync_interval:
+            return
+        self.last_sync = now
+        open_until = self.shared_state.get_open_until(self.name) or 0.0
+        if open_until > now:
+            with self.lock:
+                if self.state == CLOSED:
+                    self.state = OPEN
+                    self.open_until = open_until
+
+
+breakers: Dict[str, CircuitBreaker] = {}
+breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Returns the per-container breaker for an upstream, creating it on first use.
+
+    When the COORDINATION_TABLE environment variable is set, open circuits
+    are shared across containers through that table.
+
+    Args:
+        name (str): The upstream name.
+
+    Returns:
+        CircuitBreaker: The breaker for the upstream.
+    """
+    with breakers_lock:
+        if name not in breakers:
+            table_name = os.environ.get("COORDINATION_TABLE")
+            shared_state = SharedCircuitState(table_name) if table_name else None
+            breakers[name] = CircuitBreaker(name, shared_state=shared_state)
+        return breakers[name]
@@ -4,15 +4,29 @@ from decimal import Decimal
 
 import boto3
 from boto3.dynamodb.conditions import Key
+from botocore.config import Config
 from dynamodb_json import json_util
 
+from deadline import check_deadline
 from decimalencoder import DecimalEncoder
 from exception_handling import catch_and_raise
 
-dynamodb = boto3.resource("dynamodb")
+# botocore defaults to 60 s connect/read timeouts, far beyond the API Gateway limit
+dynamodb = boto3.resource(
+    "dynamodb",
+    config=Config(connect_timeout=2, read_timeout=5, retries={"max_attempts": 3, "mode": "standard"}),
+)
 logger = logging.getLogger()
 
 
+def _check_deadline(**kwargs):
+    check_deadline()
+
+
+# Every DynamoDB call, including raw table calls, is skipped once the invocation deadline passed
+dynamodb.meta.client.meta.events.register("before-call.dynamodb", _check_deadline)
+
+
 class DBRepository:
     def __init__(self, name):
         """
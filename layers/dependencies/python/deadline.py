@@ -0,0 +1,120 @@
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+from requests.exceptions import Timeout
+
+logger = logging.getLogger()
+
+GATEWAY_TIMEOUT = 29.0  # seconds, API Gateway integration limit
+SAFETY_MARGIN = 0.5  # seconds kept to log and build the response
+MIN_ATTEMPT_TIMEOUT = 0.1  # seconds, below this an upstream call is not worth sending
+
+current_deadline: ContextVar[Optional["Deadline"]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Timeout):
+    """Raised when the invocation has no time left for another upstream call."""
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        """
+        Initializes a Deadline instance.
+
+        Args:
+            seconds (float): Time budget from now, in seconds.
+
+        Returns:
+            None
+        """
+        self.expires_at = time.monotonic() + max(0.0, seconds)
+
+    @classmethod
+    def from_context(cls, context: Any, margin: float = SAFETY_MARGIN, cap: float = GATEWAY_TIMEOUT) -> "Deadline":
+        """
+        Builds the deadline of an invocation from the Lambda context.
+
+        The budget is the remaining Lambda time, never more than the API
+        Gateway limit, minus a safety margin. Local runs (context {} or None)
+        get the gateway limit.
+
+        Args:
+            context (Any): The Lambda context object.
+            margin (float): Seconds reserved to finish the response.
+            cap (float): Upper bound for the budget.
+
+        Returns:
+            Deadline: The invocation deadline.
+        """
+        get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+        seconds = cap
+        if callable(get_remaining):
+            seconds = min(cap, get_remaining() / 1000.0)
+        return cls(seconds - margin)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() < MIN_ATTEMPT_TIMEOUT
+
+
+def remaining_budget(default: float) -> float:
+    """
+    Returns the time an upstream call may use: default, capped by the current deadline.
+
+    Args:
+        default (float): The budget used when no deadline is active.
+
+    Returns:
+        float: Seconds available for the call.
+
+    Raises:
+        DeadlineExceeded: If the current deadline has no usable time left.
+    """
+    deadline = current_deadline.get()
+    if deadline is None:
+        return default
+    if deadline.expired():
+        raise DeadlineExceeded("Sin tiempo restante para llamar al servicio externo")
+    return min(default, deadline.remaining())
+
+
+def check_deadline():
+    """
+    Raises DeadlineExceeded if the current deadline has no usable time left.
+    """
+    deadline = current_deadline.get()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded("Sin tiempo restante para llamar al servicio externo")
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline) -> Iterator[Deadline]:
+    """
+    Makes deadline the current one inside the with block.
+    """
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
+
+
+def with_deadline(function: Callable) -> Callable:
+    """
+    Handler decorator that scopes a Deadline to the invocation.
+
+    Upstream calls made while the handler runs, including those run on the
+    async client executor, read it through current_deadline.
+    """
+    @functools.wraps(function)
+    def wrapper(event, context, *args, **kwargs):
+        with deadline_scope(Deadline.from_context(context)):
+            return function(event, context, *args, **kwargs)
+
+    return wrapper
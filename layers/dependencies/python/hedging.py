@@ -0,0 +1,173 @@
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional
+
+import requests
+
+logger = logging.getLogger()
+
+MIN_SAMPLES = 20
+SAMPLE_WINDOW = 200
+
+# Primary and hedged attempts run here while the caller waits on both
+executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+class HedgeBudget:
+    def __init__(self, ratio: float = 0.05, burst: int = 5):
+        """
+        Initializes a HedgeBudget instance.
+
+        Every request earns ratio of a token and every hedge spends a whole
+        one, so hedges stay around ratio of the traffic with a small burst.
+
+        Args:
+            ratio (float): Fraction of requests that may be hedged.
+            burst (int): Maximum tokens saved up while traffic is calm.
+
+        Returns:
+            None
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = float(burst)
+        self.lock = threading.Lock()
+
+    def record_request(self):
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class Hedger:
+    def __init__(self, name: str, percentile: float = 95.0, min_delay: float = 0.05, budget: Optional[HedgeBudget] = None):
+        """
+        Initializes a Hedger instance.
+
+        A read that has not answered after the recent latency percentile of
+        its path gets a second identical request; the first response wins.
+        Until MIN_SAMPLES latencies are known for a path it is not hedged.
+
+        Args:
+            name (str): The upstream name, used in logs.
+            percentile (float): Latency percentile (0-100) that triggers the hedge.
+            min_delay (float): Lower bound in seconds for the hedge delay.
+            budget (HedgeBudget, optional): Caps the extra load. Defaults to 5% of requests.
+
+        Returns:
+            None
+        """
+        self.name = name
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.budget = budget or HedgeBudget()
+        self.samples: Dict[str, Deque[float]] = {}
+        self.lock = threading.Lock()
+
+    def delay_for(self, key: str) -> Optional[float]:
+        with self.lock:
+            samples = sorted(self.samples.get(key) or ())
+        if len(samples) < MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, math.ceil(self.percentile / 100.0 * len(samples)) - 1)
+        return max(self.min_delay, samples[index])
+
+    def record_latency(self, key: str, seconds: float):
+        with self.lock:
+            self.samples.setdefault(key, deque(maxlen=SAMPLE_WINDOW)).append(seconds)
+
+    def call(
+        self,
+        key: str,
+        send: Callable[[], requests.Response],
+        can_hedge: Optional[Callable[[], bool]] = None,
+    ) -> requests.Response:
+        """
+        Sends a read, hedging it if it is slower than usual and budget remains.
+
+        Args:
+            key (str): Groups latencies, usually the request path.
+            send (Callable[[], requests.Response]): Sends one copy of the request.
+            can_hedge (Callable[[], bool], optional): Last check before hedging,
+                e.g. taking upstream quota without waiting for it.
+
+        Returns:
+            requests.Response: The first successful response.
+
+        Raises:
+            Exception: The error of the last copy to fail when none succeeded.
+        """
+        self.budget.record_request()
+        delay = self.delay_for(key)
+        if delay is None:
+            return self._timed(key, send)
+
+        pending = {self._submit(key, send)}
+        done, pending = wait(pending, timeout=delay)
+        if not done and self.budget.try_spend() and (can_hedge is None or can_hedge()):
+            logger.info(f"Hedge de {self.name} para {key} tras {delay:.3f}s")
+            pending.add(self._submit(key, send))
+
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.add_done_callback(_close_response)
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    def _submit(self, key: str, send: Callable[[], requests.Response]):
+        # Each copy runs in its own context copy so the invocation deadline follows it
+        return executor.submit(contextvars.copy_context().run, self._timed, key, send)
+
+    def _timed(self, key: str, send: Callable[[], requests.Response]) -> requests.Response:
+        started = time.monotonic()
+        response = send()
+        self.record_latency(key, time.monotonic() - started)
+        return response
+
+
+def _close_response(future):
+    if future.exception() is None and future.result().raw is not None:
+        future.result().close()
+
+
+hedgers: Dict[str, Hedger] = {}
+hedgers_lock = threading.Lock()
+
+
+def get_hedger(name: str) -> Hedger:
+    """
+    Returns the per-container hedger for an upstream, creating it on first use.
+
+    The percentile comes from <NAME>_HEDGE_PERCENTILE (default 95) and the
+    budget from <NAME>_HEDGE_BUDGET (fraction of requests, default 0.05).
+
+    Args:
+        name (str): The upstream name.
+
+    Returns:
+        Hedger: The hedger for the upstream.
+    """
+    with hedgers_lock:
+        if name not in hedgers:
+            percentile = float(os.environ.get(f"{name.upper()}_HEDGE_PERCENTILE") or 95)
+            ratio = float(os.environ.get(f"{name.upper()}_HEDGE_BUDGET") or 0.05)
+            hedgers[name] = Hedger(name, percentile, budget=HedgeBudget(ratio))
+        return hedgers[name]
@@ -0,0 +1,190 @@
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from botocore.exceptions import ClientError
+from requests.exceptions import RequestException
+
+from db_repository import DBRepository
+from deadline import remaining_budget
+
+logger = logging.getLogger()
+
+READ = "read"
+MUTATION = "mutation"
+BACKGROUND = "background"  # scheduled jobs: only idle capacity, never at the expense of live traffic
+DEFAULT_RATE_PER_SECOND = 10
+BACKGROUND_MAX_WAIT = 30.0  # seconds; jobs have no caller waiting, only their deadline
+
+
+class RateLimitExceeded(RequestException):
+    """Raised when no upstream quota could be obtained within the wait budget."""
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        name: str,
+        rate_per_second: int,
+        table_name: Optional[str] = None,
+        read_share: float = 0.7,
+        background_share: float = 0.2,
+        batch_size: int = 2,
+        max_wait: float = 2.0,
+    ):
+        """
+        Initializes a RateLimiter instance.
+
+        The quota is shared by every container through one atomic counter per
+        one-second window in the coordination table. Each container reserves a
+        few tokens per round trip and spends them locally. Reads may only use
+        read_share of the window so that mutations always find capacity.
+        Background reads only get a token while the whole window (live traffic
+        included) is below background_share, so a job can never take more than
+        that share and live reads always keep read_share minus it.
+
+        Args:
+            name (str): The upstream name (e.g. "acuity").
+            rate_per_second (int): Account-wide requests allowed per second.
+            table_name (str, optional): Coordination table; without it the limit is per container.
+            read_share (float): Fraction of each window available to reads.
+            background_share (float): Fraction of each window background reads may fill.
+            batch_size (int): Tokens reserved per DynamoDB round trip for reads.
+            max_wait (float): Seconds to wait for quota before giving up.
+
+        Returns:
+            None
+        """
+        self.name = name
+        self.rate_per_second = max(1, rate_per_second)
+        self.repository = DBRepository(table_name) if table_name else None
+        self.read_share = read_share
+        self.background_share = background_share
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self.window = 0
+        self.tokens = 0
+        self.local_used = 0
+        self.lock = threading.Lock()
+
+    def limit_for(self, priority: str) -> int:
+        if priority == MUTATION:
+            return self.rate_per_second
+        if priority == BACKGROUND:
+            return max(1, math.floor(self.rate_per_second * self.background_share))
+        return max(1, math.floor(self.rate_per_second * self.read_share))
+
+    def acquire(self, priority: str = READ):
+        """
+        Blocks until a token is available for the given priority, up to max_wait
+        seconds (BACKGROUND_MAX_WAIT for background reads), within the deadline.
+
+        Raises:
+            RateLimitExceeded: If no token was obtained within the wait budget.
+            DeadlineExceeded: If the invocation deadline already passed.
+        """
+        max_wait = BACKGROUND_MAX_WAIT if priority == BACKGROUND else self.max_wait
+        give_up_at = time.monotonic() + remaining_budget(max_wait)
+        while True:
+            now = time.time()
+            window = int(now)
+            with self.lock:
+                if self.window != window:
+                    self.window = window
+                    self.tokens = 0
+                    self.local_used = 0
+                if self.tokens > 0:
+                    self.tokens -= 1
+                    return
+            if self._reserve(window, priority):
+                return
+            wait = window + 1 - now
+            if time.monotonic() + wait > give_up_at:
+                raise RateLimitExceeded(f"Cuota agotada para {self.name}")
+            time.sleep(wait)
+
+    def try_acquire(self, priority: str = READ) -> bool:
+        """
+        Takes a token for the given priority only if one is available right now.
+
+        Returns:
+            bool: True if a token was taken.
+        """
+        window = int(time.time())
+        with self.lock:
+            if self.window != window:
+                self.window = window
+                self.tokens = 0
+                self.local_used = 0
+            if self.tokens > 0:
+                self.tokens -= 1
+                return True
+        return self._reserve(window, priority)
+
+    def _reserve(self, window: int, priority: str) -> bool:
+        limit = self.limit_for(priority)
+        if self.repository is None:
+            return self._reserve_local(window, limit, 1)
+        # Only live reads reserve ahead; background tokens are taken one at a time
+        wanted = self.batch_size if priority == READ else 1
+        for count in sorted({wanted, 1}, reverse=True):
+            try:
+                self.repository.table.update_item(
+                    Key={"pk": f"ratelimit#{self.name}", "sk": str(window)},
+                    UpdateExpression="ADD #used :count SET #expiresAt = :expiresAt",
+                    ConditionExpression="attribute_not_exists(#used) OR #used <= :max",
+                    ExpressionAttributeNames={"#used": "used", "#expiresAt": "expiresAt"},
+                    ExpressionAttributeValues={
+                        ":count": count,
+                        ":max": limit - count,
+                        ":expiresAt": window + 60,
+                    },
+                )
+            except ClientError as error:
+                if error.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                    continue
+                logger.warning(f"Rate limiter sin DynamoDB, se usa cuota local: {error}")
+                return self._reserve_local(window, limit, 1)
+            with self.lock:
+                if self.window == window:
+                    self.tokens += count - 1
+            return True
+        return False
+
+    def _reserve_local(self, window: int, limit: int, count: int) -> bool:
+        with self.lock:
+            if self.window != window:
+                self.window = window
+                self.tokens = 0
+                self.local_used = 0
+            if self.local_used + count > limit:
+                return False
+            self.local_used += count
+            return True
+
+
+limiters: Dict[str, RateLimiter] = {}
+limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """
+    Returns the per-container limiter for an upstream, creating it on first use.
+
+    The rate comes from the <NAME>_RATE_LIMIT environment variable (requests
+    per second) and the shared counters from COORDINATION_TABLE.
+
+    Args:
+        name (str): The upstream name.
+
+    Returns:
+        RateLimiter: The limiter for the upstream.
+    """
+    with limiters_lock:
+        if name not in limiters:
+            rate = int(os.environ.get(f"{name.upper()}_RATE_LIMIT") or DEFAULT_RATE_PER_SECOND)
+            limiters[name] = RateLimiter(name, rate, os.environ.get("COORDINATION_TABLE"))
+        return limiters[name]
@@ -0,0 +1,149 @@
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import requests
+from requests.exceptions import ConnectionError, ConnectTimeout, Timeout
+
+from deadline import remaining_budget
+
+logger = logging.getLogger()
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "DELETE"}
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Statuses that guarantee the upstream did not apply the request, so even a
+# non-idempotent mutation can be sent again safely.
+NOT_APPLIED_STATUSES = {429}
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 2.0,
+        deadline: float = 12.0,
+    ):
+        """
+        Initializes a RetryPolicy instance.
+
+        Args:
+            max_attempts (int): Maximum number of attempts, including the first one.
+            base_delay (float): Base delay in seconds for the exponential backoff.
+            max_delay (float): Upper bound in seconds for a single backoff delay.
+            deadline (float): Total time budget in seconds for all attempts and waits,
+                further capped by the invocation deadline when one is active.
+
+        Returns:
+            None
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def call(
+        self,
+        send: Callable[[float], requests.Response],
+        method: str = "GET",
+        idempotent: Optional[bool] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """
+        Sends a request, retrying transient failures with jittered backoff.
+
+        Idempotent requests are retried on timeouts, connection errors and
+        retryable statuses. Mutations are only retried when the upstream is
+        known not to have applied them (connect timeout or 429), unless the
+        caller marks them as idempotent.
+
+        Args:
+            send (Callable[[float], requests.Response]): Sends one attempt using the given timeout.
+            method (str): The HTTP method, used to infer idempotency.
+            idempotent (bool, optional): Overrides the idempotency inferred from the method.
+            timeout (float, optional): Timeout for a single attempt. Defaults to the deadline.
+
+        Returns:
+            requests.Response: The last upstream response.
+
+        Raises:
+            DeadlineExceeded: If the invocation deadline left no time for an attempt.
+            requests.RequestException: The last error when no retry is possible.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        budget = remaining_budget(self.deadline)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = budget - (time.monotonic() - started)
+            attempt_timeout = min(timeout, remaining) if timeout else remaining
+            try:
+                response = send(max(attempt_timeout, 0.1))
+            except (Timeout, ConnectionError) as error:
+                if not self._can_retry_error(error, idempotent):
+                    raise
+                delay = self.backoff(attempt)
+                if not self._has_budget(attempt, started, delay, budget):
+                    raise
+                logger.warning(
+                    f"Reintentando {method} tras error de red ({type(error).__name__}), intento {attempt}"
+                )
+            else:
+                if not self._can_retry_status(response.status_code, idempotent):
+                    return response
+                retry_after = self.retry_after(response)
+                delay = retry_after if retry_after is not None else self.backoff(attempt)
+                if not self._has_budget(attempt, started, delay, budget):
+                    return response
+                logger.warning(
+                    f"Reintentando {method} tras HTTP {response.status_code}, intento {attempt}"
+                )
+                response.close()
+            time.sleep(delay)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns a full-jitter exponential backoff delay for the given attempt.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    @staticmethod
+    def retry_after(response: requests.Response) -> Optional[float]:
+        """
+        Parses the Retry-After header (delta seconds or HTTP date).
+
+        Returns:
+            float or None: Seconds to wait, or None if the header is missing or invalid.
+        """
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _has_budget(self, attempt: int, started: float, delay: float, budget: float) -> bool:
+        if attempt >= self.max_attempts:
+            return False
+        return time.monotonic() - started + delay < budget
+
+    @staticmethod
+    def _can_retry_error(error: Exception, idempotent: bool) -> bool:
+        if idempotent:
+            return True
+        return isinstance(error, ConnectTimeout)
+
+    @staticmethod
+    def _can_retry_status(status: int, idempotent: bool) -> bool:
+        if idempotent:
+            return status in RETRYABLE_STATUSES
+        return status in NOT_APPLIED_STATUSES
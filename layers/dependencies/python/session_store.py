@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from db_repository import DBRepository
+
+logger = logging.getLogger()
+
+SESSION_TTL = float(os.environ.get("SESSION_TTL_SECONDS") or 900)
+
+
+def hash_token(token: str) -> str:
+    """
+    Returns the SHA-256 of a bearer token; raw tokens are never stored.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def parse_expiry(expires_at: Optional[str]) -> Optional[float]:
+    """
+    Parses an ISO 8601 expiry as returned by Shopify (e.g. "2025-10-01T12:00:00Z").
+
+    Returns:
+        float or None: Epoch seconds, or None if missing or invalid.
+    """
+    if not expires_at:
+        return None
+    try:
+        return datetime.fromisoformat(str(expires_at).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class SessionStore:
+    def __init__(self, table_name: Optional[str] = None, ttl: float = SESSION_TTL):
+        """
+        Initializes a SessionStore instance.
+
+        Maps a hashed Shopify customer access token to the customer context
+        resolved for it, so any authorizer container can skip Shopify. Items
+        expire through the table TTL attribute after ttl seconds, or at the
+        token expiry if it comes first.
+
+        Args:
+            table_name (str, optional): The sessions table. Defaults to SESSIONS_TABLE;
+                without it the store is disabled.
+            ttl (float): Maximum seconds a session is trusted without asking Shopify again.
+
+        Returns:
+            None
+        """
+        table_name = table_name or os.environ.get("SESSIONS_TABLE")
+        self.repository = DBRepository(table_name) if table_name else None
+        self.ttl = ttl
+
+    def get(self, token_hash: str) -> Tuple[Optional[Dict[str, str]], Optional[float]]:
+        """
+        Returns the stored customer context and its expiry (epoch seconds).
+
+        Errors are logged and treated as a miss.
+        """
+        if self.repository is None:
+            return None, None
+        try:
+            item = self.repository.table.get_item(Key={"tokenHash": token_hash}).get("Item")
+        except Exception as error:
+            logger.warning(f"No se pudo leer la sesión: {error}")
+            return None, None
+        # DynamoDB deletes expired items lazily, so expiry is checked here too
+        if not item or float(item.get("expiresAt") or 0) <= time.time():
+            return None, None
+        return dict(item.get("context") or {}), float(item["expiresAt"])
+
+    def put(self, token_hash: str, context: Dict[str, str], token_expires_at: Optional[float] = None) -> float:
+        """
+        Stores the customer context of a validated token.
+
+        Args:
+            token_hash (str): The hashed token (see hash_token).
+            context (dict): The authorizer policy context.
+            token_expires_at (float, optional): Token expiry in epoch seconds, when known.
+
+        Returns:
+            float: The expiry given to the session, in epoch seconds.
+        """
+        expires_at = time.time() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        if self.repository is None:
+            return expires_at
+        try:
+            self.repository.table.put_item(Item={
+                "tokenHash": token_hash,
+                "context": context,
+                "expiresAt": int(expires_at),
+            })
+        except Exception as error:
+            logger.warning(f"No se pudo guardar la sesión: {error}")
+        return expires_at
@@ -0,0 +1,126 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger()
+
+VERSION = "v1"
+SESSION_TOKEN_TTL = float(os.environ.get("SESSION_TOKEN_TTL_SECONDS") or 3600)
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def is_session_token(token: Optional[str]) -> bool:
+    """
+    Tells signed session tokens apart from Shopify customer access tokens, which have no dots.
+    """
+    return bool(token) and token.startswith(f"{VERSION}.") and token.count(".") == 2
+
+
+class SessionTokenSigner:
+    def __init__(self, secrets: Optional[str] = None, ttl: float = SESSION_TOKEN_TTL):
+        """
+        Initializes a SessionTokenSigner instance.
+
+        Tokens look like "v1.<payload>.<signature>": a base64url JSON payload
+        with the customer claims and expiry, signed with HMAC-SHA256. The
+        authorizer verifies them with CPU work only, no network I/O.
+
+        Args:
+            secrets (str, optional): Comma-separated secrets; the first one signs and
+                all of them verify, to allow rotation. Defaults to SESSION_TOKEN_SECRET.
+                Without secrets the mode is disabled.
+            ttl (float): Maximum token lifetime in seconds.
+
+        Returns:
+            None
+        """
+        secrets = secrets if secrets is not None else os.environ.get("SESSION_TOKEN_SECRET", "")
+        self.keys: List[bytes] = [s.strip().encode("utf-8") for s in secrets.split(",") if s.strip()]
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.keys) > 0
+
+    def mint(self, context: Dict[str, str], token_expires_at: Optional[float] = None) -> Tuple[str, float]:
+        """
+        Signs a session token for a customer context.
+
+        Args:
+            context (dict): The authorizer context (see shopify_client.customer_context).
+            token_expires_at (float, optional): Shopify token expiry in epoch seconds; the
+                session token never outlives it.
+
+        Returns:
+            Tuple[str, float]: The token and its expiry in epoch seconds.
+        """
+        expires_at = time.time() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        claims = {
+            "sub": context.get("shopifyCustomerId"),
+            "email": context.get("email") or "",
+            "phone": context.get("phone") or "",
+            "fn": context.get("firstName") or "",
+            "ln": context.get("lastName") or "",
+            "exp": int(expires_at),
+        }
+        if context.get("profileLinked") == "true":
+            # The users_links profile travels in the token, so verifying it needs no DynamoDB read
+            claims["acid"] = context.get("acuityClientId") or ""
+            claims["pl"] = 1
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        signing_input = f"{VERSION}.{payload}"
+        return f"{signing_input}.{self._sign(self.keys[0], signing_input)}", float(claims["exp"])
+
+    def verify(self, token: str, shop_domain: Optional[str] = None) -> Tuple[Optional[Dict[str, str]], Optional[float]]:
+        """
+        Verifies a session token and rebuilds the authorizer context.
+
+        Returns:
+            Tuple[dict or None, float or None]: The context and expiry, or (None, None)
+            if the token is malformed, tampered with or expired.
+        """
+        if not self.enabled or not is_session_token(token):
+            return None, None
+        signing_input, _, signature = token.rpartition(".")
+        if not any(hmac.compare_digest(self._sign(key, signing_input), signature) for key in self.keys):
+            return None, None
+        try:
+            claims = json.loads(_b64decode(signing_input.split(".", 1)[1]))
+            expires_at = float(claims["exp"])
+            customer_id = str(int(claims["sub"]))
+        except (ValueError, KeyError, TypeError):
+            return None, None
+        if expires_at <= time.time():
+            return None, None
+        context = {
+            "shopifyCustomerGID": f"gid://shopify/Customer/{customer_id}",
+            "shopifyCustomerId": customer_id,
+            "email": str(claims.get("email") or ""),
+            "firstName": str(claims.get("fn") or ""),
+            "lastName": str(claims.get("ln") or ""),
+            "phone": str(claims.get("phone") or ""),
+            "shopDomain": shop_domain or "",
+            "tokenType": "session_token",
+        }
+        if claims.get("pl"):
+            context["acuityClientId"] = str(claims.get("acid") or "")
+            context["profileLinked"] = "true"
+        return context, expires_at
+
+    @staticmethod
+    def _sign(key: bytes, signing_input: str) -> str:
+        return _b64encode(hmac.new(key, signing_input.encode("ascii"), hashlib.sha256).digest())
@@ -0,0 +1,186 @@
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import CircuitBreaker, get_breaker
+from retry_policy import RetryPolicy
+
+logger = logging.getLogger()
+
+DEFAULT_TIMEOUT = 8  # seconds
+WARM_TIMEOUT = 2  # seconds
+DEFAULT_API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-07")
+POOL_CONNECTIONS = 1
+POOL_MAXSIZE = 4
+
+CUSTOMER_QUERY = (
+    "query customerByToken($token: String!) { "
+    "customer(customerAccessToken: $token) { id email firstName lastName phone } "
+    "}"
+)
+CUSTOMER_ACCESS_TOKEN_CREATE = (
+    "mutation customerAccessTokenCreate($input: CustomerAccessTokenCreateInput!) { "
+    "customerAccessTokenCreate(input: $input) { "
+    "customerAccessToken { accessToken expiresAt } "
+    "userErrors { message } "
+    "} "
+    "}"
+)
+
+
+def parse_customer_gid(gid: Optional[str]) -> str:
+    try:
+        if not gid:
+            return "anonymous"
+        # Expected format: gid://shopify/Customer/123456789
+        parts = str(gid).strip().split("/")
+        num = parts[-1]
+        return str(int(num))  # normalize and validate numeric
+    except Exception:
+        return "anonymous"
+
+
+def customer_context(data: Optional[Dict[str, Any]], shop_domain: Optional[str]) -> Optional[Dict[str, str]]:
+    """
+    Builds the authorizer policy context from a customer query response.
+
+    Args:
+        data (dict, optional): The decoded GraphQL response of CUSTOMER_QUERY.
+        shop_domain (str, optional): The shop domain.
+
+    Returns:
+        dict or None: The context, or None if the response has no valid customer.
+    """
+    customer = (((data or {}).get("data") or {}).get("customer")) if isinstance(data, dict) else None
+    if not customer or not isinstance(customer, dict) or not customer.get("id"):
+        return None
+
+    gid = str(customer.get("id"))
+    customer_id_num = parse_customer_gid(gid)
+    if customer_id_num == "anonymous":
+        return None
+    return {
+        "shopifyCustomerGID": gid,
+        "shopifyCustomerId": customer_id_num,
+        "email": str(customer.get("email") or ""),
+        "firstName": str(customer.get("firstName") or ""),
+        "lastName": str(customer.get("lastName") or ""),
+        "phone": str(customer.get("phone") or ""),
+        "shopDomain": shop_domain or "",
+        "tokenType": "shopify_customer_access_token",
+    }
+
+
+def _build_session() -> requests.Session:
+    """
+    Builds the module-global session used for every Storefront call.
+
+    Returns:
+        requests.Session: A keep-alive session with the Storefront headers.
+    """
+    http_session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=0,
+    )
+    http_session.mount("https://", adapter)
+    http_session.headers.update({
+        "Content-Type": "application/json",
+        "Connection": "keep-alive",
+        "X-Shopify-Storefront-Access-Token": os.getenv("SHOPIFY_STOREFRONT_ACCESS_TOKEN") or "",
+    })
+    return http_session
+
+
+session = _build_session()
+
+
+class StorefrontClient:
+    def __init__(
+        self,
+        shop_domain: Optional[str] = None,
+        api_version: str = DEFAULT_API_VERSION,
+        timeout: float = DEFAULT_TIMEOUT,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initializes a StorefrontClient instance.
+
+        Args:
+            shop_domain (str, optional): The shop domain. Defaults to SHOPIFY_STORE_DOMAIN.
+            api_version (str): The Storefront API version.
+            timeout (float): Timeout in seconds for each attempt.
+            retry_policy (RetryPolicy, optional): Retry policy bounded by timeout.
+            circuit_breaker (CircuitBreaker, optional): Defaults to the container-wide "shopify" breaker.
+
+        Returns:
+            None
+        """
+        self.shop_domain = shop_domain or os.getenv("SHOPIFY_STORE_DOMAIN")
+        self.endpoint = f"https://{self.shop_domain}/api/{api_version}/graphql.json"
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=2, deadline=timeout)
+        self.circuit_breaker = circuit_breaker or get_breaker("shopify")
+
+    def warm(self):
+        """
+        Opens the TLS connection to the shop ahead of the first request.
+
+        Meant to run at module import, during the Lambda init phase; the
+        pooled connection is then reused by the first real query. Failures
+        are only logged.
+        """
+        if not self.shop_domain:
+            return
+        try:
+            session.head(self.endpoint, timeout=WARM_TIMEOUT).close()
+        except requests.RequestException as error:
+            logger.warning(f"No se pudo precalentar la conexión con Shopify: {error}")
+
+    def post(self, query: str, variables: Dict[str, Any], idempotent: Optional[bool] = None) -> requests.Response:
+        """
+        Sends a GraphQL document to the Storefront API.
+
+        Args:
+            query (str): The GraphQL document (see the module constants).
+            variables (dict): The document variables.
+            idempotent (bool, optional): True for read-only queries so they are retried
+                like GETs; mutations are only retried when Shopify did not apply them.
+
+        Returns:
+            requests.Response: The raw upstream response.
+
+        Raises:
+            CircuitOpenError: If Shopify is failing and the call was not attempted.
+        """
+        payload = {"query": query, "variables": variables}
+        return self.circuit_breaker.call(
+            lambda: self.retry_policy.call(
+                lambda timeout: session.post(self.endpoint, json=payload, timeout=timeout),
+                method="POST",
+                idempotent=idempotent,
+                timeout=self.timeout,
+            )
+        )
+
+    def graphql(self, query: str, variables: Dict[str, Any], idempotent: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Sends a GraphQL document and returns the decoded JSON body.
+
+        Raises:
+            requests.HTTPError: If Shopify answers with a non-2xx status.
+        """
+        response = self.post(query, variables, idempotent=idempotent)
+        response.raise_for_status()
+        return response.json() or {}
+
+    def get_customer(self, customer_token: str) -> Dict[str, Any]:
+        return self.graphql(CUSTOMER_QUERY, {"token": customer_token}, idempotent=True)
+
+    def create_customer_access_token(self, email: str, password: str) -> requests.Response:
+        return self.post(CUSTOMER_ACCESS_TOKEN_CREATE, {"input": {"email": email, "password": password}})
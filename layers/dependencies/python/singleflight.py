@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlencode
+
+from botocore.exceptions import ClientError
+
+from db_repository import DBRepository
+from deadline import DeadlineExceeded, current_deadline
+from decimalencoder import DecimalEncoder
+
+logger = logging.getLogger()
+
+MAX_SHARED_RESULT_BYTES = 300 * 1024  # DynamoDB items are capped at 400 KB
+
+
+def make_key(method: str, path: str, params: Optional[dict] = None) -> str:
+    """
+    Builds a normalized request key: same method, path and params in any order give the same key.
+
+    Args:
+        method (str): The HTTP method.
+        path (str): The request path.
+        params (dict, optional): Query string parameters. None values are ignored.
+
+    Returns:
+        str: The normalized key.
+    """
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None)
+    return f"{method.upper()} {path}?{urlencode(items)}"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class DistributedLease:
+    def __init__(self, table_name: str, lease_seconds: float = 3.0, poll_interval: float = 0.1):
+        """
+        Initializes a DistributedLease instance.
+
+        The first container to take the lease for a key runs the request and
+        stores its result in the coordination table; other containers poll the
+        item until the result appears or the lease expires.
+
+        Args:
+            table_name (str): The coordination DynamoDB table.
+            lease_seconds (float): How long a leader owns a key.
+            poll_interval (float): Seconds between polls while waiting for a leader.
+
+        Returns:
+            None
+        """
+        self.repository = DBRepository(table_name)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+    def run(self, key: str, function: Callable[[], Any]) -> Any:
+        item_key = {"pk": f"flight#{hashlib.sha256(key.encode('utf-8')).hexdigest()}", "sk": "lease"}
+        now = time.time()
+        try:
+            self.repository.table.put_item(
+                Item={**item_key, "leaseUntil": Decimal(str(now + self.lease_seconds)), "expiresAt": int(now) + 60},
+                ConditionExpression="attribute_not_exists(pk) OR leaseUntil < :now",
+                ExpressionAttributeValues={":now": Decimal(str(now))},
+            )
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                logger.warning(f"Singleflight sin DynamoDB: {error}")
+                return function()
+            found, result = self._wait_for_leader(item_key)
+            if found:
+                return result
+            return function()
+
+        try:
+            result = function()
+        except Exception:
+            # Release the lease so waiting containers fetch on their own right away
+            self._release(item_key)
+            raise
+        self._publish(item_key, result)
+        return result
+
+    def _wait_for_leader(self, item_key: dict):
+        while True:
+            try:
+                item = self.repository.table.get_item(Key=item_key, ConsistentRead=True).get("Item")
+            except ClientError:
+                return False, None
+            if not item:
+                return False, None
+            if "result" in item:
+                return True, json.loads(item["result"])
+            if float(item.get("leaseUntil") or 0) < time.time():
+                return False, None
+            time.sleep(self.poll_interval)
+
+    def _release(self, item_key: dict):
+        try:
+            self.repository.table.delete_item(Key=item_key)
+        except Exception as error:
+            logger.warning(f"No se pudo liberar el lease de singleflight: {error}")
+
+    def _publish(self, item_key: dict, result: Any):
+        try:
+            body = json.dumps(result, cls=DecimalEncoder)
+            if len(body) > MAX_SHARED_RESULT_BYTES:
+                self._release(item_key)
+                return
+            # Readable only for one lease window, so staleness is bounded by lease_seconds
+            self.repository.table.put_item(Item={
+                **item_key,
+                "leaseUntil": Decimal(str(time.time() + self.lease_seconds)),
+                "result": body,
+                "expiresAt": int(time.time()) + 60,
+            })
+        except Exception as error:
+            logger.warning(f"No se pudo publicar el resultado de singleflight: {error}")
+
+
+class SingleFlight:
+    def __init__(self, lease: Optional[DistributedLease] = None):
+        """
+        Initializes a SingleFlight instance.
+
+        Concurrent callers (threads or asyncio tasks running on the executor)
+        asking for the same key share one execution and its parsed result.
+        Callers must treat the shared result as read-only.
+
+        Args:
+            lease (DistributedLease, optional): Extends coalescing across containers.
+
+        Returns:
+            None
+        """
+        self.lease = lease
+        self.calls: Dict[str, _Call] = {}
+        self.lock = threading.Lock()
+
+    def do(self, key: str, function: Callable[[], Any]) -> Any:
+        """
+        Runs function once for all concurrent callers of the same key.
+
+        Args:
+            key (str): The normalized request key (see make_key).
+            function (Callable[[], Any]): Produces the result.
+
+        Returns:
+            Any: The shared result.
+
+        Raises:
+            Exception: The error raised by the leader, re-raised to every caller.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self.calls[key] = call
+
+        if not leader:
+            deadline = current_deadline.get()
+            if not call.done.wait(deadline.remaining() if deadline else None):
+                raise DeadlineExceeded("Sin tiempo restante esperando una solicitud en curso")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.lease is not None:
+                call.result = self.lease.run(key, function)
+            else:
+                call.result = function()
+            return call.result
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+
+
+flight: Optional[SingleFlight] = None
+flight_lock = threading.Lock()
+
+
+def get_singleflight() -> SingleFlight:
+    """
+    Returns the container-wide SingleFlight.
+
+    Cross-container coalescing is enabled when SINGLEFLIGHT_SHARED is "true"
+    and COORDINATION_TABLE is set.
+
+    Returns:
+        SingleFlight: The shared instance.
+    """
+    global flight
+    with flight_lock:
+        if flight is None:
+            table_name = os.environ.get("COORDINATION_TABLE")
+            shared = os.environ.get("SINGLEFLIGHT_SHARED", "").lower() == "true"
+            flight = SingleFlight(DistributedLease(table_name) if shared and table_name else None)
+        return flight
@@ -0,0 +1,139 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+logger = logging.getLogger()
+
+MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, max_size: int = 256, ttl: float = 300.0, stale_ttl: float = 0.0):
+        """
+        Initializes a TTLCache instance.
+
+        A bounded, thread-safe in-process cache. Entries expire after ttl
+        seconds and the least recently used entry is evicted when full. For
+        stale_ttl seconds after expiring, the old value is still served to
+        concurrent callers, and as a fallback, while one caller refreshes it.
+
+        Args:
+            max_size (int): Maximum number of entries.
+            ttl (float): Seconds an entry is fresh.
+            stale_ttl (float): Extra seconds an expired entry may be served while revalidating.
+
+        Returns:
+            None
+        """
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self.refreshing = set()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the fresh value for key, or default when missing or expired.
+        """
+        value, fresh = self._lookup(key)
+        if value is MISSING or not fresh:
+            return default
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the stored value for key even if expired, without touching LRU order.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Stores a value. A per-entry ttl overrides the cache default.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_or_load(
+        self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None, timed: bool = False
+    ) -> Any:
+        """
+        Returns the cached value, loading it on a miss.
+
+        Inside the stale window the caller refreshes the value synchronously,
+        within its own invocation and deadline; concurrent callers get the
+        stale value meanwhile, and loader errors during the refresh keep and
+        return the stale value.
+
+        Args:
+            key (Hashable): The cache key.
+            loader (Callable[[], Any]): Produces the value on a miss.
+            ttl (float, optional): Overrides the default ttl for this entry.
+            timed (bool): The loader returns (value, ttl), e.g. the remaining lifetime of a
+                copy read from a shared cache; that ttl caps the given one.
+
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        value, fresh = self._lookup(key)
+        if value is not MISSING:
+            if not fresh:
+                return self._refresh(key, value, loader, ttl, timed)
+            return value
+        return self._store(key, loader(), ttl, timed)
+
+    def _store(self, key: Hashable, loaded: Any, ttl: Optional[float], timed: bool) -> Any:
+        if timed:
+            loaded, loaded_ttl = loaded
+            ttl = loaded_ttl if ttl is None else min(ttl, loaded_ttl)
+        self.set(key, loaded, ttl)
+        return loaded
+
+    def _lookup(self, key: Hashable):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING, False
+            value, expires_at = entry
+            if now < expires_at:
+                self.entries.move_to_end(key)
+                return value, True
+            if now < expires_at + self.stale_ttl:
+                return value, False
+            del self.entries[key]
+            return MISSING, False
+
+    def _refresh(
+        self, key: Hashable, stale: Any, loader: Callable[[], Any], ttl: Optional[float], timed: bool
+    ) -> Any:
+        # No detached threads: Lambda freezes the container between invocations,
+        # which would stall a background refresh mid-request.
+        with self.lock:
+            if key in self.refreshing:
+                return stale
+            self.refreshing.add(key)
+        try:
+            return self._store(key, loader(), ttl, timed)
+        except Exception as error:
+            logger.warning(f"No se pudo refrescar la caché para {key}: {error}")
+            return stale
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
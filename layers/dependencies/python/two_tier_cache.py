@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Any, Callable, Optional, Tuple
+
+from db_repository import DBRepository
+from decimalencoder import DecimalEncoder
+from ttl_cache import MISSING, TTLCache
+
+logger = logging.getLogger()
+
+# Bump when the shape of cached values changes so old L2 entries are ignored
+CACHE_VERSION = 1
+
+
+class TwoTierCache:
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        l1_ttl: Optional[float] = None,
+        l1_stale_ttl: float = 0.0,
+        l1_max_size: int = 256,
+        table_name: Optional[str] = None,
+    ):
+        """
+        Initializes a TwoTierCache instance.
+
+        L1 is the in-process TTLCache of the container. L2 is the shared
+        DynamoDB cache table, so a cold container still gets hits written by
+        any other container. L2 values are zlib-compressed JSON stamped with
+        CACHE_VERSION and expire through the table TTL attribute.
+
+        Args:
+            namespace (str): Prefix that isolates the keys of one use case.
+            ttl (float): Seconds an entry lives in L2.
+            l1_ttl (float, optional): Seconds an entry lives in L1. Defaults to ttl.
+            l1_stale_ttl (float): Stale-while-revalidate window for L1.
+            l1_max_size (int): Maximum number of L1 entries.
+            table_name (str, optional): The cache table. Defaults to CACHE_TABLE; without it only L1 is used.
+
+        Returns:
+            None
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.l1_ttl = ttl if l1_ttl is None else min(l1_ttl, ttl)
+        self.l1 = TTLCache(max_size=l1_max_size, ttl=self.l1_ttl, stale_ttl=l1_stale_ttl)
+        table_name = table_name or os.environ.get("CACHE_TABLE")
+        self.repository = DBRepository(table_name) if table_name else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Returns the cached value from L1, then L2, or default on a miss.
+        """
+        value = self.l1.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        value, remaining = self._get_l2(key)
+        if value is MISSING:
+            return default
+        self.l1.set(key, value, min(self.l1_ttl, remaining))
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Stores a value in both tiers.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        self.l1.set(key, value, min(self.l1_ttl, ttl))
+        self._set_l2(key, value, ttl)
+
+    def delete(self, key: str):
+        """
+        Removes a value from both tiers. Other containers keep their L1 copy until it expires.
+        """
+        self.l1.delete(key)
+        if self.repository is None:
+            return
+        try:
+            self.repository.table.delete_item(Key={"cacheKey": self._l2_key(key)})
+        except Exception as error:
+            logger.warning(f"No se pudo borrar {key} de la caché L2: {error}")
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Returns the cached value, trying L1, then L2, then the loader.
+
+        Args:
+            key (str): The cache key inside the namespace.
+            loader (Callable[[], Any]): Produces the value (e.g. an Acuity or Shopify read).
+            ttl (float, optional): Overrides the default L2 ttl for this entry.
+
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        return self.l1.get_or_load(key, lambda: self._load(key, loader, ttl), min(self.l1_ttl, ttl), timed=True)
+
+    def _load(self, key: str, loader: Callable[[], Any], ttl: float) -> Tuple[Any, float]:
+        """
+        Reads L2, then the loader. Returns the value and the seconds it has left,
+        so an L1 copy of an L2 hit never outlives the L2 entry.
+        """
+        value, remaining = self._get_l2(key)
+        if value is not MISSING:
+            return value, remaining
+        previous = self.l1.peek(key, MISSING)
+        value = loader()
+        if value is previous:
+            # Revalidated as unchanged upstream: extend L2 without serializing again
+            if self._touch_l2(key, ttl):
+                return value, ttl
+        self._set_l2(key, value, ttl)
+        return value, ttl
+
+    def _l2_key(self, key: str) -> str:
+        return f"{self.namespace}#{key}"
+
+    def _get_l2(self, key: str):
+        if self.repository is None:
+            return MISSING, 0.0
+        try:
+            item = self.repository.table.get_item(Key={"cacheKey": self._l2_key(key)}).get("Item")
+        except Exception as error:
+            logger.warning(f"No se pudo leer {key} de la caché L2: {error}")
+            return MISSING, 0.0
+        if not item or int(item.get("version") or 0) != CACHE_VERSION:
+            return MISSING, 0.0
+        # DynamoDB deletes expired items lazily, so expiry is checked here too
+        remaining = float(item.get("expiresAt") or 0) - time.time()
+        if remaining <= 0:
+            return MISSING, 0.0
+        try:
+            return json.loads(zlib.decompress(item["value"].value)), remaining
+        except Exception as error:
+            logger.warning(f"Entrada inválida en la caché L2 para {key}: {error}")
+            return MISSING, 0.0
+
+    def _touch_l2(self, key: str, ttl: float) -> bool:
+        if self.repository is None:
+            return True
+        try:
+            now = time.time()
+            self.repository.table.update_item(
+                Key={"cacheKey": self._l2_key(key)},
+                UpdateExpression="SET #storedAt = :storedAt, #expiresAt = :expiresAt",
+                ConditionExpression="attribute_exists(#value) AND #version = :version",
+                ExpressionAttributeNames={
+                    "#storedAt": "storedAt",
+                    "#expiresAt": "expiresAt",
+                    "#value": "value",
+                    "#version": "version",
+                },
+                ExpressionAttributeValues={
+                    ":storedAt": int(now * 1000),
+                    ":expiresAt": int(now + ttl),
+                    ":version": CACHE_VERSION,
+                },
+            )
+            return True
+        except Exception:
+            return False
+
+    def _set_l2(self, key: str, value: Any, ttl: float):
+        if self.repository is None:
+            return
+        try:
+            now = time.time()
+            self.repository.table.put_item(Item={
+                "cacheKey": self._l2_key(key),
+                "value": zlib.compress(json.dumps(value, cls=DecimalEncoder).encode("utf-8")),
+                "version": CACHE_VERSION,
+                "storedAt": int(now * 1000),
+                "expiresAt": int(now + ttl),
+            })
+        except Exception as error:
+            logger.warning(f"No se pudo escribir {key} en la caché L2: {error}")
@@ -0,0 +1,45 @@
+import logging
+from typing import Any, Dict
+
+logger = logging.getLogger()
+
+PROFILE = "les-aimants"
+PROFILE_FIELDS = ("email", "shopDomain", "firstName", "lastName", "phone")
+
+
+def link_profile(db_links: Any, context: Dict[str, str]) -> Dict[str, str]:
+    """
+    Adds the users_links profile of a customer to an authorizer context.
+
+    Meant for the paths that already call Shopify (login and token validation):
+    the result is stored with the session, so cached and signed tokens carry the
+    profile without reading users_links again. The profile is created, or
+    updated, only when missing or when the Shopify data changed, keeping
+    acuityClientId and createdAt.
+
+    Args:
+        db_links (DBUserLinks): The users_links repository of the calling Lambda.
+        context (dict): The customer context (see shopify_client.customer_context).
+
+    Returns:
+        dict: The context with acuityClientId (empty until linked to an Acuity client)
+        and profileLinked "true". If DynamoDB fails the context is returned as is, and
+        downstream Lambdas store the profile themselves.
+    """
+    customer_id = context.get("shopifyCustomerId")
+    if not customer_id:
+        return context
+    try:
+        existing = db_links.get({"customerId": str(customer_id), "profile": PROFILE}) or {}
+        fresh = {field: context.get(field) or "" for field in PROFILE_FIELDS}
+        profile = existing
+        if not existing or any(str(existing.get(field) or "") != value for field, value in fresh.items()):
+            profile = db_links.upsert_profile(customer_id, {**existing, **fresh})
+    except Exception as error:
+        logger.warning(f"No se pudo resolver el perfil de {customer_id}: {error}")
+        return context
+    return {
+        **context,
+        "acuityClientId": str(profile.get("acuityClientId") or ""),
+        "profileLinked": "true",
+    }
@@ -42,6 +42,8 @@ class ApiGateway(Construct):
         appointment_types_resource = self.api.root.add_resource("appointment-types")
         # /customer-token
         customer_token_resource = self.api.root.add_resource("customer-token")
+        # /webhooks/acuity
+        acuity_webhook_resource = self.api.root.add_resource("webhooks").add_resource("acuity")
 
         self.add_method("POST", self.api.root, lambdas.create_appointment)
         self.add_method("PUT", self.api.root, lambdas.edit_appointment)
@@ -51,6 +53,8 @@ class ApiGateway(Construct):
         self.add_method("POST", cancel_resource, lambdas.cancel_appointment)
         self.add_method("GET", appointment_types_resource, lambdas.get_appointment_types)
         self.add_method("POST", customer_token_resource, lambdas.customer_token, auth=False)
+        # Acuity cannot send our bearer tokens; the handler verifies X-Acuity-Signature instead
+        self.add_method("POST", acuity_webhook_resource, lambdas.acuity_webhook, auth=False)
 
     def add_method(self, method, resource: _apigw.Resource, function_name, auth=True):
         lambda_integration = _apigw.LambdaIntegration(
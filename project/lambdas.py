@@ -26,11 +26,24 @@ class Lambdas(Construct):
 
         environment = {
             "USER_LINKS_TABLE": tables.users_links.table_name,
+            "COORDINATION_TABLE": tables.coordination.table_name,
+            "CACHE_TABLE": tables.cache.table_name,
+            "SESSIONS_TABLE": tables.sessions.table_name,
+            "AVAILABILITY_TABLE": tables.availability.table_name,
             "ACUITY_USER_ID": config["ACUITY_USER_ID"],
             "ACUITY_API_KEY": config["ACUITY_API_KEY"],
             "SHOPIFY_STORE_DOMAIN": config["SHOPIFY_STORE_DOMAIN"],
             "SHOPIFY_STOREFRONT_ACCESS_TOKEN": config["SHOPIFY_STOREFRONT_ACCESS_TOKEN"],
             "SHOPIFY_API_VERSION": config["SHOPIFY_API_VERSION"],
+            "ACUITY_RATE_LIMIT": str(config.get("ACUITY_RATE_LIMIT", 10)),
+            "CATALOG_CACHE_TTL_SECONDS": str(config.get("CATALOG_CACHE_TTL_SECONDS", 3600)),
+            "AVAILABILITY_CACHE_TTL_SECONDS": str(config.get("AVAILABILITY_CACHE_TTL_SECONDS", 60)),
+            "AVAILABILITY_VIEW_MAX_AGE_SECONDS": str(config.get("AVAILABILITY_VIEW_MAX_AGE_SECONDS", 1800)),
+            "AUTH_CACHE_TTL_SECONDS": str(config.get("AUTH_CACHE_TTL_SECONDS", 300)),
+            "SESSION_TTL_SECONDS": str(config.get("SESSION_TTL_SECONDS", 900)),
+            # Optional: enables signed session tokens when set (comma-separated for rotation)
+            "SESSION_TOKEN_SECRET": config.get("SESSION_TOKEN_SECRET", ""),
+            "SESSION_TOKEN_TTL_SECONDS": str(config.get("SESSION_TOKEN_TTL_SECONDS", 3600)),
         }
 
         # Layer
@@ -46,13 +59,35 @@ class Lambdas(Construct):
 
         self.authorizer = self.create_function("authorizer", environment, config, permissions.role)
         self.get_calendars = self.create_function("get-calendars", environment, config, permissions.role)
-        self.get_appointments = self.create_function("get-appointments", environment, config, permissions.role)
+        # Availability spikes: coalesce identical Acuity reads across containers too
+        self.get_appointments = self.create_function(
+            "get-appointments", {**environment, "SINGLEFLIGHT_SHARED": "true"}, config, permissions.role
+        )
         self.get_user_appointment = self.create_function("get-user-appointment", environment, config, permissions.role)
         self.create_appointment = self.create_function("create-appointment", environment, config, permissions.role)
         self.edit_appointment = self.create_function("edit-appointment", environment, config, permissions.role)
         self.cancel_appointment = self.create_function("cancel-appointment", environment, config, permissions.role)
         self.get_appointment_types = self.create_function("get-appointment-types", environment, config, permissions.role)
         self.customer_token = self.create_function("customer-token", environment, config, permissions.role)
+        # Scheduled (see stack.py); not exposed through the API
+        self.materialize_availability = self.create_function(
+            "materialize-availability",
+            {
+                **environment,
+                "MATERIALIZE_DAYS": str(config.get("MATERIALIZE_DAYS", 14)),
+                "MATERIALIZE_TIMEZONE": config.get("MATERIALIZE_TIMEZONE", ""),
+            },
+            config,
+            permissions.role,
+            duration=900,
+        )
+        # Public but signed: Acuity change notifications (see api_gateway.py)
+        self.acuity_webhook = self.create_function(
+            "acuity-webhook",
+            {**environment, "MATERIALIZE_TIMEZONE": config.get("MATERIALIZE_TIMEZONE", "")},
+            config,
+            permissions.role,
+        )
 
     def create_function(self, function_name: str, environment: dict, config: dict, role: _iam.Role, duration: int = 30):
         """
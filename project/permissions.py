@@ -34,6 +34,7 @@ class Permissions(Construct):
                 "dynamodb:PutItem",
                 "dynamodb:UpdateItem",
                 "dynamodb:DeleteItem",
+                "dynamodb:BatchWriteItem",
             ],
             resources=[
                 f"arn:aws:dynamodb:{region}:{account}:table/{scope.node.id}*",
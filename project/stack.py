@@ -1,4 +1,10 @@
-from aws_cdk import Stack, aws_cognito as _cognito
+from aws_cdk import (
+    Duration,
+    Stack,
+    aws_cognito as _cognito,
+    aws_events as _events,
+    aws_events_targets as _targets,
+)
 from constructs import Construct
 
 from project.api_gateway import ApiGateway
@@ -36,4 +42,12 @@ class ProjectStack(Stack):
 
         rest_api = ApiGateway(self, f"{construct_id}-api-gateway", lambdas)
 
+        # Keeps the materialized availability view fresh
+        _events.Rule(
+            self,
+            f"{construct_id}-materialize-availability",
+            schedule=_events.Schedule.rate(Duration.minutes(int(config.get("MATERIALIZE_RATE_MINUTES", 15)))),
+            targets=[_targets.LambdaFunction(lambdas.materialize_availability)],
+        )
+
         self.api = rest_api.api
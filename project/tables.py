@@ -12,6 +12,22 @@ class Tables(Construct):
         self.users_links = self.create_table(
             f"{scope.node.id}-user-links", "customerId", "profile"
         )
+        # Shared runtime state between containers (circuit breakers, etc.)
+        self.coordination = self.create_table(
+            f"{scope.node.id}-coordination", "pk", "sk", time_to_live_attribute="expiresAt"
+        )
+        # Shared L2 cache for upstream reads
+        self.cache = self.create_table(
+            f"{scope.node.id}-cache", "cacheKey", time_to_live_attribute="expiresAt"
+        )
+        # Validated Shopify tokens (hashed) and the customer context resolved for them
+        self.sessions = self.create_table(
+            f"{scope.node.id}-sessions", "tokenHash", time_to_live_attribute="expiresAt"
+        )
+        # Materialized availability: slots per calendar#appointmentType#timezone and day
+        self.availability = self.create_table(
+            f"{scope.node.id}-availability", "availabilityKey", "date", time_to_live_attribute="expiresAt"
+        )
 
     def create_table(self, table_name, pk, sk=None, time_to_live_attribute=None):
         if sk is not None: